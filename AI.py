@@ -1,12 +1,141 @@
+import time
+import importlib
+import numpy as np
+from Transposition import EXACT, LOWER, UPPER, NO_MOVE, TranspositionTable
+from ProofNumber import ProofNumberSearch
+from Solver import KalahaSolver
+from PositionCache import engine_fingerprint, position_key
+from Kernels import get_kernel
+from Rules import DEFAULT_RULES
+
+
+# Evaluation weights of (store difference, seed difference, extra turn moves, capturing moves)
+DEFAULT_WEIGHTS = (8, 2, 5, 14)
+
+# Late move reductions: moves after the first LMR_FULL_DEPTH_MOVES ordered ones
+# are searched LMR_REDUCTION plies shallower at nodes with at least LMR_MIN_DEPTH plies left
+LMR_FULL_DEPTH_MOVES = 3
+LMR_MIN_DEPTH = 3
+LMR_REDUCTION = 1
+
+
+def margin_value(margin):
+    """Map a final store margin to the terminal value scale.
+
+    Wins score above 1000 and losses below -1000, so any win beats any heuristic
+    evaluation and larger wins beat smaller ones.
+    """
+    if margin > 0:
+        return 1000 + margin
+    if margin < 0:
+        return -1000 + margin
+    return 0
+
+
+class SearchAborted(Exception):
+    """Raised inside the search when it has been asked to stop."""
+
+
 class KalahaAI:
-    def __init__(self, max_depth=7):
+    # Whether the same position always yields the same move
+    deterministic = True
+    
+    # Whether _evaluate always gives the same value for a position, so that
+    # evaluations can be cached; unlike deterministic this ignores timing
+    deterministic_eval = True
+
+    def __init__(self, max_depth=7, tablebase=None, transposition_table=None, weights=DEFAULT_WEIGHTS,
+                 time_budget=None, pn_threshold=None, pn_nodes=100000, lmr=False, futility=False,
+                 futility_margin=40, endgame_threshold=None, position_cache=None):
         """Initialize the AI with a maximum search depth.
         
         Args:
             max_depth (int): Maximum depth for the MinMax algorithm
+            tablebase (Tablebase): Optional exact position values used for perfect play
+            transposition_table: Optional TranspositionTable or SharedTranspositionTable
+            weights (tuple): Evaluation weights, see DEFAULT_WEIGHTS
+            time_budget (float): Optional seconds per move; the search then deepens
+                iteratively up to max_depth until the budget runs out
+            pn_threshold (int): Optional number of seeds in play at or below which
+                proof-number search tries to prove the result before searching
+            pn_nodes (int): Node budget of each proof-number search
+            lmr (bool): Search late quiet moves at reduced depth, re-searching
+                them at full depth if they beat the bound
+            futility (bool): Skip quiet moves one ply above the leaves whose
+                store gain cannot lift the static evaluation to the bound
+            futility_margin (float): Evaluation swing allowed for a quiet move
+                besides its store gain
+            endgame_threshold (int): Optional number of seeds in play at or below
+                which positions are solved exactly on the final store margin
+            position_cache (PositionCache): Optional persistent cache of search
+                results shared across runs; only used by deterministic engines
         """
         self.max_depth = max_depth
+        self.weights = tuple(weights)
+        self.time_budget = time_budget
+        
+        # Moves of a budgeted search depend on timing
+        if time_budget is not None:
+            self.deterministic = False
+        self.tablebase = tablebase
+        self.transposition_table = transposition_table
+        
+        # Proven results are cached, so later searches skip those subtrees
+        self.pn_threshold = pn_threshold
+        self.pn_nodes = pn_nodes
+        self.proof_search = ProofNumberSearch(pn_nodes) if pn_threshold is not None else None
+        
+        # Selective search, applied to quiet moves only (no free turn, capture or game end)
+        self.lmr = lmr
+        self.futility = futility
+        self.futility_margin = futility_margin
+        
+        # Exact endgame values; the solver's table is keyed by pits only, so it
+        # stays valid for the rest of the game
+        self.endgame_threshold = endgame_threshold
+        self.endgame_solver = KalahaSolver() if endgame_threshold is not None else None
+        
+        # Search results kept across runs, keyed by the engine fingerprint (see search)
+        self.position_cache = position_cache
+        
+        # Evaluations keyed by canonical position, relative to the side to move
+        self.eval_cache = {}
+        self.eval_cache_size = 1000000
+        
+        # Search instrumentation and control
+        self.nodes = 0
+        self.stop_event = None  # Event that aborts the search when set
+        self.order_rng = None  # Random generator breaking ties in move ordering
+        self.reductions = 0  # Late moves searched at reduced depth
+        self.re_searches = 0  # Reduced moves searched again at full depth
+        self.futility_prunes = 0  # Quiet moves skipped by futility pruning
+        self._deadline = None
     
+    def get_spec(self):
+        """Return a serializable description of the engine configuration."""
+        spec = {
+            'engine': self.__class__.__name__,
+            'max_depth': self.max_depth,
+            'weights': list(self.weights)
+        }
+        if self.tablebase is not None:
+            spec['tablebase'] = self.tablebase.path
+        if self.transposition_table is not None:
+            spec['transposition_table'] = True
+        if self.time_budget is not None:
+            spec['time_budget'] = self.time_budget
+        if self.pn_threshold is not None:
+            spec['pn_threshold'] = self.pn_threshold
+            spec['pn_nodes'] = self.pn_nodes
+        if self.lmr:
+            spec['lmr'] = True
+        if self.futility:
+            spec['futility'] = True
+            spec['futility_margin'] = self.futility_margin
+        if self.endgame_threshold is not None:
+            spec['endgame_threshold'] = self.endgame_threshold
+        return spec
+
     def get_best_move(self, game):
         """Return the best move for the current player using MinMax with alpha-beta pruning.
         
@@ -16,95 +145,273 @@ class KalahaAI:
         Returns:
             int: The index of the best pit to choose
         """
-        valid_moves = game.get_possible_moves()
+        return self.search(game)[0]
+    
+    def search(self, game):
+        """Search the current position and report the result.
+        
+        With a time budget the search deepens iteratively until the budget runs
+        out and keeps the result of the deepest completed iteration. With a
+        position cache, positions searched before by the same configuration
+        are answered from the cache.
+        
+        Args:
+            game (Game): The current game state
+            
+        Returns:
+            tuple: (best move, its value for the side to move or None if unknown,
+                completed search depth)
+        """
+        key = self._cache_key(game)
+        if key is not None:
+            entry = self.position_cache.get(key)
+            if entry is not None:
+                return entry
+        
+        result = self._search(game)
+        if key is not None and result[0] is not None:
+            self.position_cache.put(key, *result)
+        return result
+    
+    def search_many(self, games):
+        """Search several positions, looking them all up in the position cache at once.
+        
+        Args:
+            games (list): Game states to search
+            
+        Returns:
+            list: search() result of every game, in order
+        """
+        keys = [self._cache_key(game) for game in games]
+        cached = {}
+        if self.position_cache is not None:
+            cached = self.position_cache.get_many([key for key in keys if key is not None])
+        
+        results = []
+        searched = {}
+        for game, key in zip(games, keys):
+            result = cached.get(key) or searched.get(key)
+            if result is None:
+                result = self._search(game)
+                if key is not None and result[0] is not None:
+                    searched[key] = result
+            results.append(result)
         
-        if not valid_moves:
+        if searched:
+            self.position_cache.put_many(searched)
+        return results
+    
+    def _cache_key(self, game):
+        """Return the position cache key of a game, or None if results are not cached.
+        
+        Only deterministic engines use the cache, as a cached move would
+        otherwise hide the variation between searches.
+        """
+        if self.position_cache is None or not self.deterministic:
             return None
+        return engine_fingerprint(self.get_spec()), self.max_depth, position_key(game)
+    
+    def _search(self, game):
+        """Search a position without the position cache, see search."""
+        children = game.expand()
+        
+        if not children:
+            return None, None, 0
+        
+        # Play perfectly when the tablebase knows every child position
+        if self.tablebase is not None:
+            solution = self.tablebase.solve(game)
+            if solution is not None:
+                return solution['best_move'], margin_value(solution['value']), 0
+        
+        # Play a proven win or draw when few seeds remain
+        if self.proof_search is not None and game.board.get_seeds_in_play() <= self.pn_threshold:
+            proof = self.proof_search.solve(game)
+            if proof['move'] is not None:
+                return proof['move'], self._proven_value(game), 0
+        
+        # Solve the endgame exactly when few seeds remain
+        if self._in_endgame(game):
+            start_nodes = self.endgame_solver.nodes
+            solution = self.endgame_solver.solve(game)
+            self.nodes += self.endgame_solver.nodes - start_nodes
+            return solution['best_move'], margin_value(solution['value']), 0
         
+        if self.time_budget is None:
+            best_move, best_value = self._search_root(game, children, self.max_depth)
+            return best_move, best_value, self.max_depth
+        
+        # Fall back to the first ordered move if not even depth 1 completes
+        result = (self._order_moves(children)[0].move, None, 0)
+        self._deadline = time.perf_counter() + self.time_budget
+        try:
+            for depth in range(1, self.max_depth + 1):
+                best_move, best_value = self._search_root(game, children, depth)
+                result = (best_move, best_value, depth)
+        except SearchAborted:
+            pass
+        finally:
+            self._deadline = None
+        return result
+    
+    def analyze(self, game, depth=None, time_budget=None, multipv=None):
+        """Score the root moves and return the best lines of one search.
+
+        Each iteration of the deepening search uses the k-th best score found
+        so far as the alpha bound, so moves outside the top k are only proven
+        worse instead of being scored exactly. Without a transposition table a
+        temporary one is used, which carries work across iterations and moves
+        and provides the principal variations.
+
+        Args:
+            game (Game): The position to analyze
+            depth (int): Search depth (max_depth by default)
+            time_budget (float): Optional seconds for the analysis; the result of
+                the deepest completed iteration is returned
+            multipv (int): Number of lines to score exactly (all moves by default)
+
+        Returns:
+            dict: 'depth' completed, 'nodes' searched and 'lines', a list of
+                {'move', 'value', 'pv'} sorted from best to worst with values
+                for the side to move
+        """
+        depth = depth or self.max_depth
+        children = game.expand()
+        multipv = min(multipv or len(children), len(children))
+
+        result = {'depth': 0, 'nodes': 0, 'lines': []}
+        if not children:
+            return result
+
+        transposition_table = self.transposition_table
+        if transposition_table is None:
+            self.transposition_table = TranspositionTable()
+        start_nodes = self.nodes
+        if time_budget is not None:
+            self._deadline = time.perf_counter() + time_budget
+
+        try:
+            ranking = [child.move for child in self._order_moves(children)]
+            for iteration_depth in range(1, depth + 1):
+                scores = self._score_root_moves(game, children, ranking, iteration_depth, multipv)
+                ranking = sorted(scores, key=scores.get, reverse=True)
+                result['depth'] = iteration_depth
+                result['lines'] = [
+                    {'move': move, 'value': scores[move],
+                     'pv': self._principal_variation(game, move, iteration_depth)}
+                    for move in ranking[:multipv]
+                ]
+        except SearchAborted:
+            pass
+        finally:
+            self._deadline = None
+            self.transposition_table = transposition_table
+
+        result['nodes'] = self.nodes - start_nodes
+        return result
+
+    def _score_root_moves(self, game, children, ranking, depth, multipv):
+        """Search every root move with the k-th best score so far as alpha.
+
+        Args:
+            ranking (list): Moves in the order to search them, best guess first
+
+        Returns:
+            dict: Value of every move, exact for the top multipv moves and an
+                upper bound for the rest
+        """
+        children_by_move = {child.move: child for child in children}
+        scores = {}
+
+        for move in ranking:
+            child = children_by_move[move]
+
+            # Only a move that beats the current k-th best needs an exact score
+            best = sorted(scores.values(), reverse=True)
+            alpha = best[multipv - 1] if len(best) >= multipv else float('-inf')
+
+            maximizing = child.current_player == game.current_player
+            scores[move] = self._min_max(game.get_child(child), depth - 1, alpha, float('inf'), maximizing)
+
+        best_move = max(scores, key=scores.get)
+        self._tt_store(game, depth, EXACT, scores[best_move], best_move, True)
+        return scores
+
+    def _principal_variation(self, game, move, depth):
+        """Follow transposition table moves from a root move.
+
+        Returns:
+            list: Moves of the line, starting with the root move
+        """
+        pv = [move]
+        game = game.clone()
+        game.make_move(move)
+
+        while len(pv) < depth and not game.game_over:
+            next_move = self._tt_move(game)
+            if next_move not in game.get_possible_moves():
+                break
+            pv.append(next_move)
+            game.make_move(next_move)
+        return pv
+
+    def _search_root(self, game, children, depth):
+        """Search all moves of the root position to the given depth.
+        
+        Args:
+            game (Game): The current game state
+            children (list): Children of the root from Game.expand
+            depth (int): Search depth
+            
+        Returns:
+            tuple: (best move, its value)
+        """
         # Order moves to improve efficiency
-        ordered_moves = self._order_moves(game, valid_moves)
+        ordered_children = self._order_moves(children, self._tt_move(game))
             
-        best_move = ordered_moves[0]
+        best_move = ordered_children[0].move
         best_value = float('-inf')
         alpha = float('-inf')
         beta = float('inf')
         
-        for move in ordered_moves:
-            # Create a copy of the game to simulate the move
-            game_copy = game.clone()
-            game_copy.make_move(move)
+        for child in ordered_children:
+            game_copy = game.get_child(child)
             
             # If player gets another turn, continue searching from their perspective
-            if game_copy.current_player == game.current_player:
-                value = self._min_max(game_copy, self.max_depth - 1, alpha, beta, True)
+            if child.current_player == game.current_player:
+                value = self._min_max(game_copy, depth - 1, alpha, beta, True)
             else:
-                value = self._min_max(game_copy, self.max_depth - 1, alpha, beta, False)
+                value = self._min_max(game_copy, depth - 1, alpha, beta, False)
                 
             if value > best_value:
                 best_value = value
-                best_move = move
+                best_move = child.move
                 
             alpha = max(alpha, best_value)
+        
+        if self.transposition_table is not None:
+            self._tt_store(game, depth, EXACT, best_value, best_move, True)
             
-        return best_move
+        return best_move, best_value
     
-    def _order_moves(self, game, moves):
+    def _order_moves(self, children, tt_move=NO_MOVE):
         """Order moves to improve alpha-beta pruning efficiency.
-        Prioritize moves that land in store (extra turn) or might capture.
+        Prioritize the transposition table move, then moves that land in store
+        (extra turn) or capture.
         
         Args:
-            game (Game): Current game state
-            moves (list): List of possible moves
+            children (list): Children of the current position from Game.expand
+            tt_move (int): Best move stored in the transposition table, if any
             
         Returns:
-            list: Ordered list of moves
+            list: Ordered list of children
         """
-        scored_moves = []
-        board = game.board
+        if self.order_rng is not None:
+            rng = self.order_rng
+            return sorted(children, key=lambda child: (child.move == tt_move, 10 * child.free_turn + child.capture, rng.random()), reverse=True)
         
-        for move in moves:
-            score = 0
-            game_copy = game.clone()
-            
-            # Calculate actual board index
-            actual_idx = move if game_copy.current_player == 0 else move + board.pits + 1
-            seeds = game_copy.board[actual_idx]
-            
-            # Check if this might land in the store (extra turn)
-            player_store = board.get_player_store(game_copy.current_player)
-            
-            # Calculate where the last seed will land
-            last_idx = actual_idx
-            seeds_to_distribute = seeds
-            
-            while seeds_to_distribute > 0:
-                last_idx = (last_idx + 1) % (2 * board.pits + 2)
-                # Skip opponent's store
-                opponent_store = board.get_player_store(1 - game_copy.current_player)
-                if last_idx == opponent_store:
-                    continue
-                seeds_to_distribute -= 1
-            
-            # Check if last seed lands in store (extra turn)
-            if last_idx == player_store:
-                score += 10  # Highly prioritize extra turns
-            
-            # Check if this might lead to a capture
-            is_player_side = False
-            if game_copy.current_player == 0:
-                is_player_side = 0 <= last_idx < board.pits
-            else:
-                is_player_side = board.pits + 1 <= last_idx < 2 * board.pits + 1
-                
-            if is_player_side and game_copy.board[last_idx] == 0:
-                opposite_idx = board.get_opposite_pit(last_idx)
-                if opposite_idx is not None:
-                    score += game_copy.board[opposite_idx]  # Prioritize by capture value
-                    
-            scored_moves.append((move, score))
-            
-        # Sort moves by score in descending order
-        return [move for move, score in sorted(scored_moves, key=lambda x: x[1], reverse=True)]
+        # Extra turns first, then by the number of seeds captured
+        return sorted(children, key=lambda child: (child.move == tt_move, 10 * child.free_turn + child.capture), reverse=True)
     
     def _min_max(self, game, depth, alpha, beta, maximizing):
         """MinMax algorithm with alpha-beta pruning.
@@ -119,74 +426,274 @@ class KalahaAI:
         Returns:
             float: The evaluation of the best move
         """
-        # Check if game is over or maximum depth reached
-        if game.game_over or depth == 0:
-            return self._evaluate(game)
+        self.nodes += 1
+        if self.nodes % 1024 == 0 and self._should_stop():
+            raise SearchAborted()
+        
+        # Check if game is over
+        if game.game_over:
+            return self._leaf_value(game, maximizing)
+        
+        # Skip subtrees already proven by proof-number search
+        if self.proof_search is not None:
+            value = self._proven_value(game)
+            if value is not None:
+                return value if maximizing else -value
+        
+        # A store holding more than half of all seeds decides the game, so
+        # score it by the guaranteed margin instead of searching on
+        lower, upper = game.get_margin_bounds(game.current_player)
+        if lower > 0 or upper < 0:
+            value = margin_value(lower if lower > 0 else upper)
+            return value if maximizing else -value
+        
+        # Exact value on the final store margin when few seeds remain
+        if self._in_endgame(game):
+            value = margin_value(self._exact_margin(game))
+            return value if maximizing else -value
+        
+        # Check if maximum depth reached
+        if depth == 0:
+            return self._leaf_value(game, maximizing)
+        
+        # Reuse results of earlier searches of this position
+        tt_move = NO_MOVE
+        if self.transposition_table is not None:
+            entry = self._tt_probe(game, maximizing)
+            if entry is not None:
+                entry_depth, flag, entry_value, tt_move = entry
+                if entry_depth >= depth:
+                    if flag == EXACT:
+                        return entry_value
+                    if flag == LOWER and entry_value >= beta:
+                        return entry_value
+                    if flag == UPPER and entry_value <= alpha:
+                        return entry_value
             
-        valid_moves = game.get_possible_moves()
+        children = game.expand()
         
-        if not valid_moves:
-            return self._evaluate(game)
+        if not children:
+            return self._leaf_value(game, maximizing)
         
         # Order moves for better pruning
-        ordered_moves = self._order_moves(game, valid_moves)
+        ordered_children = self._order_moves(children, tt_move)
+        original_alpha, original_beta = alpha, beta
+        best_move = ordered_children[0].move
+        
+        # Static evaluation for futility pruning one ply above the leaves
+        futility_base = self._leaf_value(game, maximizing) if self.futility and depth == 1 else None
+        reduce_late = self.lmr and depth >= LMR_MIN_DEPTH
             
         if maximizing:
             value = float('-inf')
-            for move in ordered_moves:
-                game_copy = game.clone()
-                game_copy.make_move(move)
+            for index, child in enumerate(ordered_children):
+                quiet = not (child.free_turn or child.capture or child.game_over)
                 
-                # Check if we stay with the same player
-                if game_copy.current_player == game.current_player:
-                    # If we get another turn, continue maximizing
-                    child_value = self._min_max(game_copy, depth - 1, alpha, beta, True)
-                else:
-                    # Otherwise, switch to minimizing
-                    child_value = self._min_max(game_copy, depth - 1, alpha, beta, False)
+                # Skip quiet moves that cannot raise the score to alpha
+                if futility_base is not None and quiet:
+                    estimate = futility_base + self.weights[0] * self._store_gain(game, child)
+                    if estimate + self.futility_margin <= alpha:
+                        self.futility_prunes += 1
+                        value = max(value, estimate)
+                        continue
+                
+                game_copy = game.get_child(child)
+                
+                # Search late quiet moves shallower; quiet moves never give a free turn
+                reduced = reduce_late and quiet and index >= LMR_FULL_DEPTH_MOVES
+                if reduced:
+                    self.reductions += 1
+                    child_value = self._min_max(game_copy, depth - 1 - LMR_REDUCTION, alpha, beta, False)
+                
+                # Moves that beat alpha at reduced depth are searched again in full
+                if not reduced or child_value > alpha:
+                    if reduced:
+                        self.re_searches += 1
                     
-                value = max(value, child_value)
+                    # Check if we stay with the same player
+                    if child.current_player == game.current_player:
+                        # If we get another turn, continue maximizing
+                        child_value = self._min_max(game_copy, depth - 1, alpha, beta, True)
+                    else:
+                        # Otherwise, switch to minimizing
+                        child_value = self._min_max(game_copy, depth - 1, alpha, beta, False)
+                
+                if child_value > value:
+                    value = child_value
+                    best_move = child.move
                 alpha = max(alpha, value)
                 
                 if beta <= alpha:
                     break  # Beta cut-off
-                    
-            return value
         else:
             value = float('inf')
-            for move in ordered_moves:
-                game_copy = game.clone()
-                game_copy.make_move(move)
+            for index, child in enumerate(ordered_children):
+                quiet = not (child.free_turn or child.capture or child.game_over)
+                
+                # Skip quiet moves that cannot lower the score to beta
+                if futility_base is not None and quiet:
+                    estimate = futility_base - self.weights[0] * self._store_gain(game, child)
+                    if estimate - self.futility_margin >= beta:
+                        self.futility_prunes += 1
+                        value = min(value, estimate)
+                        continue
                 
-                # Check if we stay with the same player
-                if game_copy.current_player == game.current_player:
-                    # If opponent gets another turn, continue minimizing
-                    child_value = self._min_max(game_copy, depth - 1, alpha, beta, False)
-                else:
-                    # Otherwise, switch to maximizing
-                    child_value = self._min_max(game_copy, depth - 1, alpha, beta, True)
+                game_copy = game.get_child(child)
+                
+                # Search late quiet moves shallower; quiet moves never give a free turn
+                reduced = reduce_late and quiet and index >= LMR_FULL_DEPTH_MOVES
+                if reduced:
+                    self.reductions += 1
+                    child_value = self._min_max(game_copy, depth - 1 - LMR_REDUCTION, alpha, beta, True)
+                
+                # Moves that beat beta at reduced depth are searched again in full
+                if not reduced or child_value < beta:
+                    if reduced:
+                        self.re_searches += 1
                     
-                value = min(value, child_value)
+                    # Check if we stay with the same player
+                    if child.current_player == game.current_player:
+                        # If opponent gets another turn, continue minimizing
+                        child_value = self._min_max(game_copy, depth - 1, alpha, beta, False)
+                    else:
+                        # Otherwise, switch to maximizing
+                        child_value = self._min_max(game_copy, depth - 1, alpha, beta, True)
+                
+                if child_value < value:
+                    value = child_value
+                    best_move = child.move
                 beta = min(beta, value)
                 
                 if beta <= alpha:
                     break  # Alpha cut-off
+        
+        if self.transposition_table is not None:
+            if value <= original_alpha:
+                flag = UPPER
+            elif value >= original_beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self._tt_store(game, depth, flag, value, best_move, maximizing)
                     
-            return value
+        return value
     
-    def _evaluate(self, game):
-        """Evaluate the current game state with optimized weightings."""
+    def _proven_value(self, game):
+        """Return the value of a position settled by the proof cache, or None.
+        
+        Proven bounds on the final margin are combined with the margin bounds
+        of the position and scored by the guaranteed margin, like decided games.
+        
+        Returns:
+            float: Value for the side to move on the scale of margin_value
+        """
+        entry = self.proof_search.cache.get(game.get_canonical_key())
+        if entry is None:
+            return None
+        lower, upper = game.get_margin_bounds(game.current_player)
+        lower, upper = max(lower, entry[0]), min(upper, entry[1])
+        if lower > 0:
+            return margin_value(lower)
+        if upper < 0:
+            return margin_value(upper)
+        if lower == 0 and upper == 0:
+            return margin_value(0)
+        return None
+    
+    def _in_endgame(self, game):
+        """Return True if the exact endgame search applies to a position."""
+        return self.endgame_solver is not None and game.board.get_seeds_in_play() <= self.endgame_threshold
+    
+    def _exact_margin(self, game):
+        """Return the final store margin for the side to move under perfect play."""
+        board = game.board
+        margin = board[board.get_player_store(game.current_player)] - board[board.get_player_store(1 - game.current_player)]
+        
+        start_nodes = self.endgame_solver.nodes
+        margin += self.endgame_solver.mtdf(game)
+        self.nodes += self.endgame_solver.nodes - start_nodes
+        return margin
+    
+    @staticmethod
+    def _store_gain(game, child):
+        """Return the seeds a move adds to the mover's store."""
+        store = game.board.get_player_store(game.current_player)
+        return child.state[store] - game.board[store]
+    
+    def _should_stop(self):
+        """Return True if the stop event is set or the time budget has run out."""
+        if self.stop_event is not None and self.stop_event.is_set():
+            return True
+        return self._deadline is not None and time.perf_counter() >= self._deadline
+    
+    def _tt_probe(self, game, maximizing):
+        """Look up a position in the transposition table.
+        
+        Entries are stored relative to the side to move under the canonical key,
+        so values and bound types are flipped at minimizing nodes.
+        
+        Returns:
+            tuple: (depth, flag, value, move) from the searching player's point of view, or None
+        """
+        key = game.get_canonical_key()
+        entry = self.transposition_table.probe(key)
+        if entry is None or maximizing:
+            return entry
+        
+        depth, flag, value, move = entry
+        if flag != EXACT:
+            flag = LOWER if flag == UPPER else UPPER
+        return depth, flag, -value, move
+    
+    def _tt_store(self, game, depth, flag, value, move, maximizing):
+        """Store a search result from the searching player's point of view."""
+        if not maximizing:
+            value = -value
+            if flag != EXACT:
+                flag = LOWER if flag == UPPER else UPPER
+        key = game.get_canonical_key()
+        self.transposition_table.store(key, depth, flag, value, move)
+    
+    def _tt_move(self, game):
+        """Return the best move stored for a position, or NO_MOVE."""
+        if self.transposition_table is None:
+            return NO_MOVE
+        entry = self.transposition_table.probe(game.get_canonical_key())
+        return NO_MOVE if entry is None else entry[3]
+    
+    def _leaf_value(self, game, maximizing):
+        """Return the evaluation of a leaf from the searching player's point of view.
+        
+        _evaluate scores a position for the side to move, which is the searching
+        player only at maximizing nodes, so the sign is flipped at minimizing nodes.
+        Evaluations are cached by canonical key, so a position and its mirror
+        image share one entry.
+        """
+        if self.deterministic_eval:
+            key = game.get_canonical_key()
+            value = self.eval_cache.get(key)
+            if value is None:
+                if len(self.eval_cache) >= self.eval_cache_size:
+                    self.eval_cache.clear()
+                value = self._evaluate(game)
+                self.eval_cache[key] = value
+        else:
+            value = self._evaluate(game)
+            
+        return value if maximizing else -value
+    
+    def _features(self, game):
+        """Compute the evaluation features of a position for the side to move.
+        
+        Returns:
+            tuple: (store difference, seed difference, extra turn moves, capturing moves)
+        """
+        # Kernels count captures by the default rules only
+        kernel = get_kernel(game.board.pits, game.current_player) if game.rules is DEFAULT_RULES else None
+        if kernel is not None:
+            return kernel.features(game.board.state)
+        
         board = game.board
-
-        # If game is over, assign large values based on the winner
-        if game.game_over:
-            winner = game.get_winner()
-            if winner == game.current_player:
-                return 1000
-            elif winner is not None:
-                return -1000
-            else:
-                return 0
 
         # Store values (highest priority)
         player_store = board[board.get_player_store(game.current_player)]
@@ -209,20 +716,109 @@ class KalahaAI:
             if game.can_capture(pit):
                 capture_score += 1
 
+        return (
+            player_store - opponent_store,
+            player_seeds - opponent_seeds,
+            extra_turns,
+            capture_score
+        )
+    
+    def _terminal_value(self, game):
+        """Return the value of a finished game for the side to move, see margin_value."""
+        board = game.board
+        return margin_value(board[board.get_player_store(game.current_player)] -
+                            board[board.get_player_store(1 - game.current_player)])
+
+    def _evaluate(self, game):
+        """Evaluate the current game state as the dot product of features and weights."""
+        # If game is over, assign large values based on the winner
+        if game.game_over:
+            return self._terminal_value(game)
+
+        features = self._features(game)
+        weights = self.weights
+
         #Weighted evaluation
         return (
-            8 * (player_store - opponent_store) +
-            2 * (player_seeds - opponent_seeds) +
-            5 * extra_turns +
-            14 * capture_score 
+            weights[0] * features[0] +
+            weights[1] * features[1] +
+            weights[2] * features[2] +
+            weights[3] * features[3]
         )
+    
+    def evaluate_batch(self, game, weight_sets):
+        """Score a position under several weight sets with one feature extraction.
+        
+        Args:
+            game (Game): The position to score
+            weight_sets: Matrix with one weight set of four values per row
+            
+        Returns:
+            numpy.ndarray: One score per weight set, for the side to move
+        """
+        weight_sets = np.asarray(weight_sets)
+        if game.game_over:
+            return np.full(len(weight_sets), self._terminal_value(game))
+        return weight_sets @ np.asarray(self._features(game))
 
 class RandomKalahaAI(KalahaAI):
     """KalahaAI variant that adds randomness to evaluations."""
     
+    deterministic = False
+    deterministic_eval = False
+
     def _evaluate(self, game):
         import random
         # Get the base evaluation
         base_eval = super()._evaluate(game)
         # Add a small random factor
         return base_eval + random.uniform(-1.0, 1.0)
+
+
+class NoMoveOrderingAI(KalahaAI):
+    """AI without move ordering optimization."""
+    def _order_moves(self, children, tt_move=NO_MOVE):
+        """Return moves without any ordering."""
+        return children  # No sorting, just return the original moves
+
+
+# Modules defining the engine classes that can be created from a spec, see
+# make_engine. Engines outside this module are imported on first use.
+ENGINES = {
+    'KalahaAI': 'AI',
+    'RandomKalahaAI': 'AI',
+    'NoMoveOrderingAI': 'AI',
+    'LazySMPAI': 'LazySMP'
+}
+
+
+def get_engine_class(name):
+    """Return the engine class registered under a name in ENGINES.
+    
+    Raises:
+        ValueError: If no engine of that name is registered
+    """
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine: {name} (known engines: {', '.join(sorted(ENGINES))})")
+    return getattr(importlib.import_module(ENGINES[name]), name)
+
+
+def make_engine(spec):
+    """Create an engine from a spec returned by get_spec.
+    
+    Args:
+        spec (dict): Engine spec with the class name under 'engine'
+        
+    Returns:
+        KalahaAI: A new engine instance
+    """
+    options = dict(spec)
+    engine_class = get_engine_class(options.pop('engine'))
+    
+    if options.get('tablebase') is not None:
+        from Solver import Tablebase
+        options['tablebase'] = Tablebase.load(options['tablebase'])
+    if options.pop('transposition_table', False):
+        options['transposition_table'] = TranspositionTable()
+        
+    return engine_class(**options)
@@ -1,27 +1,346 @@
+import os
+import csv
+import json
 import time
 import random
+import argparse
 from Game import Game
-from AI import KalahaAI, RandomKalahaAI
+from Board import Board
+from Move import Move
+from AI import KalahaAI, RandomKalahaAI, NoMoveOrderingAI, make_engine
+from Profiler import add_profile_arguments, profiler_from_args, finish_profile
+from PositionCache import PositionCache
+import Kernels
 
-def benchmark_ai(ai1, ai2, num_games=50, verbose=False):
+
+def generate_openings(num_openings, plies=4, pits=6, seeds=4, rng_seed=0):
+    """Generate distinct opening positions from random legal move prefixes.
+
+    Args:
+        num_openings (int): Number of openings to generate.
+        plies (int): Number of random moves played from the start position.
+        pits (int): Number of pits per player.
+        seeds (int): Initial number of seeds per pit.
+        rng_seed (int): Seed for the random generator, so suites are reproducible.
+
+    Returns:
+        list: Move prefixes (tuples of pit indices) leading to distinct positions.
+    """
+    rng = random.Random(rng_seed)
+    openings = []
+    seen_positions = set()
+    attempts = 0
+
+    while len(openings) < num_openings and attempts < num_openings * 100:
+        attempts += 1
+        game = Game(pits, seeds)
+        prefix = []
+
+        for _ in range(plies):
+            move = rng.choice(game.get_possible_moves())
+            game.make_move(move)
+            prefix.append(move)
+            if game.game_over:
+                break
+
+        # Skip finished games and transpositions of openings we already have
+        position = (tuple(game.board.state), game.current_player)
+        if game.game_over or position in seen_positions:
+            continue
+
+        seen_positions.add(position)
+        openings.append(tuple(prefix))
+
+    return openings
+
+
+def save_openings(openings, path):
+    """Save an opening suite to a JSON file."""
+    with open(path, "w") as f:
+        json.dump([list(opening) for opening in openings], f)
+
+
+def load_openings(path):
+    """Load an opening suite saved with save_openings."""
+    with open(path) as f:
+        return [tuple(opening) for opening in json.load(f)]
+
+
+def _engine_key(ai):
+    """Return a hashable identity for an engine, or None if it is not deterministic."""
+    if not getattr(ai, "deterministic", True):
+        return None
+    return json.dumps(ai.get_spec(), sort_keys=True)
+
+
+# Game phases by the share of seeds still on the pits
+PHASES = ("opening", "middlegame", "endgame")
+
+# Upper edges (seconds) of the move latency histogram buckets
+LATENCY_BUCKETS = (0.0001, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0, float("inf"))
+
+
+def game_phase(game):
+    """Return the phase of a game from the share of seeds still in play."""
+    board = game.board
+    total_seeds = 2 * board.pits * board.seeds
+    in_play = total_seeds - board[board.pits] - board[2 * board.pits + 1]
+
+    if in_play > total_seeds * 2 / 3:
+        return "opening"
+    if in_play > total_seeds / 3:
+        return "middlegame"
+    return "endgame"
+
+
+def latency_stats(samples):
+    """Summarize move latencies with their mean, percentiles and maximum.
+
+    Args:
+        samples (list): Latencies in seconds.
+
+    Returns:
+        dict: count, mean, p50, p90, p99 and max (nearest-rank percentiles).
+    """
+    if not samples:
+        return {"count": 0, "mean": 0, "p50": 0, "p90": 0, "p99": 0, "max": 0}
+
+    ordered = sorted(samples)
+
+    def percentile(p):
+        rank = max(1, -(-len(ordered) * p // 100))  # ceil(n * p / 100)
+        return ordered[int(rank) - 1]
+
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": percentile(50),
+        "p90": percentile(90),
+        "p99": percentile(99),
+        "max": ordered[-1],
+    }
+
+
+def latency_histogram(samples):
+    """Count latencies per bucket, keyed by the bucket's upper edge in seconds (as text)."""
+    counts = [0] * len(LATENCY_BUCKETS)
+    for sample in samples:
+        for i, edge in enumerate(LATENCY_BUCKETS):
+            if sample <= edge:
+                counts[i] += 1
+                break
+    return {f"{edge:g}": count for edge, count in zip(LATENCY_BUCKETS, counts)}
+
+
+def _latency_report(latencies):
+    """Build the latency section of the results for one AI.
+
+    Args:
+        latencies (list): (phase, wall time, CPU time) per move.
+    """
+    report = {"wall": {}, "cpu": {}}
+    for clock, index in (("wall", 1), ("cpu", 2)):
+        report[clock]["all"] = latency_stats([sample[index] for sample in latencies])
+        for phase in PHASES:
+            report[clock][phase] = latency_stats([sample[index] for sample in latencies if sample[0] == phase])
+    report["histogram"] = latency_histogram([sample[1] for sample in latencies])
+    return report
+
+
+# Counters of the selective search switches (see KalahaAI), recorded like nodes
+SELECTIVE_COUNTERS = ("reductions", "re_searches", "futility_prunes")
+
+
+def play_game(first_ai, second_ai, opening=(), pits=6, seeds=4):
+    """Play a single game between two AIs and record per-seat statistics.
+
+    Args:
+        first_ai: AI playing as player 1 (seat 0).
+        second_ai: AI playing as player 2 (seat 1).
+        opening (tuple): Moves played before the AIs take over.
+        pits (int): Number of pits per player.
+        seeds (int): Initial number of seeds per pit.
+
+    Returns:
+        dict: Game record with winner, scores, captures, extra turns, timings,
+            search nodes and selective search counters per seat, and (seat, phase, wall time, CPU time) for every move.
+    """
+    game = Game(pits, seeds)
+    for move in opening:
+        game.make_move(move)
+
+    ais = (first_ai, second_ai)
+    record = {
+        "winner": None,
+        "scores": [0, 0],
+        "moves": 0,
+        "move_counts": [0, 0],
+        "move_times": [0.0, 0.0],
+        "move_latencies": [],
+        "nodes": [0, 0],
+        "captures": [0, 0],
+        "extra_turns": [0, 0],
+    }
+    for counter in SELECTIVE_COUNTERS:
+        record[counter] = [0, 0]
+
+    while not game.game_over:
+        current_player = game.current_player
+        phase = game_phase(game)
+
+        ai = ais[current_player]
+        start_nodes = getattr(ai, "nodes", 0)
+        start_counts = [getattr(ai, counter, 0) for counter in SELECTIVE_COUNTERS]
+        start_move_time = time.perf_counter()
+        start_cpu_time = time.process_time()
+        move = ai.get_best_move(game)
+        cpu_time = time.process_time() - start_cpu_time
+        move_time = time.perf_counter() - start_move_time
+        record["nodes"][current_player] += getattr(ai, "nodes", 0) - start_nodes
+        for counter, start_count in zip(SELECTIVE_COUNTERS, start_counts):
+            record[counter][current_player] += getattr(ai, counter, 0) - start_count
+
+        record["move_times"][current_player] += move_time
+        record["move_latencies"].append((current_player, phase, move_time, cpu_time))
+
+        if move is None:
+            break  # No more valid moves
+
+        # Check if move will result in capture
+        if game.can_capture(move):
+            record["captures"][current_player] += 1
+
+        game.make_move(move)
+
+        # Check if player got an extra turn
+        if game.current_player == current_player and not game.game_over:
+            record["extra_turns"][current_player] += 1
+
+        record["move_counts"][current_player] += 1
+        record["moves"] += 1
+
+    record["scores"] = [game.board[game.board.pits], game.board[2 * game.board.pits + 1]]
+    record["winner"] = game.get_winner()
+    return record
+
+
+def _play_cached(first_ai, second_ai, opening, pits, seeds, game_cache):
+    """Play a game, reusing the result of an identical deterministic game if one exists.
+
+    Two deterministic engines always play the same game from the same position,
+    so replaying it would only burn CPU time without producing a new measurement.
+
+    Args:
+        game_cache (dict): Finished games of the current benchmark, keyed by
+            (engine specs, board size, opening)
+
+    Returns:
+        tuple: (game record, True if the record came from the cache)
+    """
+    first_key = _engine_key(first_ai)
+    second_key = _engine_key(second_ai)
+
+    if first_key is None or second_key is None:
+        return play_game(first_ai, second_ai, opening, pits, seeds), False
+
+    cache_key = (first_key, second_key, pits, seeds, tuple(opening))
+    if cache_key in game_cache:
+        return game_cache[cache_key], True
+
+    record = play_game(first_ai, second_ai, opening, pits, seeds)
+    game_cache[cache_key] = record
+    return record, False
+
+
+def benchmark_ai(ai1, ai2, num_games=50, verbose=False, openings=None, pits=6, seeds=4, csv_path=None,
+                 progress=None):
     """Run AI vs AI benchmark matches and collect performance statistics.
 
     Args:
         ai1: First AI instance.
         ai2: Second AI instance.
-        num_games (int): Number of matches to simulate.
+        num_games (int): Number of matches to simulate (ignored when openings are given).
         verbose (bool): Whether to print detailed game results.
+        openings (list): Optional opening suite. Each opening is played twice,
+            once with each AI moving first.
+        pits (int): Number of pits per player.
+        seeds (int): Initial number of seeds per pit.
+        csv_path (str): Optional file receiving one row per move with its latency.
+        progress (callable): Optional function called as progress(games_done, num_games)
+            after every game.
     
     Returns:
         dict: Dictionary containing benchmark statistics.
     """
+    # Schedule games as (opening, seat of ai1)
+    if openings is None:
+        schedule = [((), 0)] * num_games
+    else:
+        schedule = [(opening, seat) for opening in openings for seat in (0, 1)]
+    num_games = len(schedule)
+
+    games = []
+    game_cache = {}  # Only games of this benchmark can repeat each other
+    for game_num, (opening, ai1_seat) in enumerate(schedule):
+        if verbose:
+            print(f"Game {game_num+1}/{num_games}")
+
+        if ai1_seat == 0:
+            record, cached = _play_cached(ai1, ai2, opening, pits, seeds, game_cache)
+        else:
+            record, cached = _play_cached(ai2, ai1, opening, pits, seeds, game_cache)
+        games.append((opening, ai1_seat, record, cached))
+
+        if progress is not None:
+            progress(game_num + 1, num_games)
+        
+        if verbose:
+            winner = record["winner"]
+            print(f"  Opening: {list(opening)}, AI 1 plays as Player {ai1_seat + 1}{' (cached)' if cached else ''}")
+            print(f"  Game {game_num+1} - Winner: {'Player 1' if winner == 0 else 'Player 2' if winner == 1 else 'Draw'}")
+            print(f"  Score: Player 1: {record['scores'][0]}, Player 2: {record['scores'][1]}")
+            print(f"  Moves: {record['moves']}, Captures: P1={record['captures'][0]}, P2={record['captures'][1]}")
+            print(f"  Extra turns: P1={record['extra_turns'][0]}, P2={record['extra_turns'][1]}")
+            print()
+
+    return summarize_games(games, ai1.get_spec(), ai2.get_spec(), csv_path)
+
+
+def summarize_games(games, spec1, spec2, csv_path=None):
+    """Aggregate game records into benchmark statistics and print them.
+
+    Cached games count towards the game results but not towards move times,
+    search nodes, selective search counters and latencies, as their searches
+    never ran.
+
+    Args:
+        games (list): (opening, seat of AI 1, game record from play_game, True if
+            cached) for every game, in schedule order.
+        spec1 (dict): Engine spec of AI 1.
+        spec2 (dict): Engine spec of AI 2.
+        csv_path (str): Optional file receiving one row per move with its latency.
+
+    Returns:
+        dict: Dictionary containing benchmark statistics.
+    """
+    num_games = len(games)
+
     ai1_wins = 0
     ai2_wins = 0
     draws = 0
     total_moves = 0
     total_time_ai1 = 0
     total_time_ai2 = 0
+    moves_ai1 = 0
+    moves_ai2 = 0
+    nodes_ai1 = 0
+    nodes_ai2 = 0
+    selective = {counter: [0, 0] for counter in SELECTIVE_COUNTERS}  # Totals of AI 1 and AI 2
+    latencies_ai1 = []
+    latencies_ai2 = []
+    move_rows = []
     game_lengths = []
+    cached_games = 0
     
     ai1_scores = []
     ai2_scores = []
@@ -32,96 +351,75 @@ def benchmark_ai(ai1, ai2, num_games=50, verbose=False):
     ai1_extra_turns = 0
     ai2_extra_turns = 0
 
-    for game_num in range(num_games):
-        if verbose:
-            print(f"Game {game_num+1}/{num_games}")
-            
-        game = Game()
-        move_count = 0
-        
-        # Track game-specific stats
-        game_ai1_captures = 0
-        game_ai2_captures = 0
-        game_ai1_extra_turns = 0
-        game_ai2_extra_turns = 0
-
-        while not game.game_over:
-            current_ai = ai1 if game.current_player == 0 else ai2
-            current_player = game.current_player
-            
-            start_move_time = time.time()
-            move = current_ai.get_best_move(game)
-            end_move_time = time.time()
-
-            if current_ai == ai1:
-                total_time_ai1 += (end_move_time - start_move_time)
-            else:
-                total_time_ai2 += (end_move_time - start_move_time)
-
-            if move is None:
-                break  # No more valid moves
-                
-            # Check if move will result in capture
-            if game.can_capture(move):
-                if current_player == 0:
-                    game_ai1_captures += 1
-                else:
-                    game_ai2_captures += 1
-            
-            # Store the player before the move
-            previous_player = game.current_player
-            
-            # Execute the move
-            game.make_move(move)
-            
-            # Check if player got an extra turn
-            if game.current_player == previous_player and not game.game_over:
-                if previous_player == 0:
-                    game_ai1_extra_turns += 1
-                else:
-                    game_ai2_extra_turns += 1
-            
-            move_count += 1
+    for game_num, (opening, ai1_seat, record, cached) in enumerate(games):
+        ai2_seat = 1 - ai1_seat
+        if cached:
+            cached_games += 1
 
         # Update game stats
-        ai1_captures += game_ai1_captures
-        ai2_captures += game_ai2_captures
-        ai1_extra_turns += game_ai1_extra_turns
-        ai2_extra_turns += game_ai2_extra_turns
+        ai1_captures += record["captures"][ai1_seat]
+        ai2_captures += record["captures"][ai2_seat]
+        ai1_extra_turns += record["extra_turns"][ai1_seat]
+        ai2_extra_turns += record["extra_turns"][ai2_seat]
         
         # Get final scores
-        player1_score = game.board[game.board.pits]
-        player2_score = game.board[2 * game.board.pits + 1]
-        ai1_scores.append(player1_score)
-        ai2_scores.append(player2_score)
+        ai1_scores.append(record["scores"][ai1_seat])
+        ai2_scores.append(record["scores"][ai2_seat])
         
         # Determine winner
-        winner = game.get_winner()
-        if winner == 0:
+        winner = record["winner"]
+        if winner == ai1_seat:
             ai1_wins += 1
-        elif winner == 1:
+        elif winner == ai2_seat:
             ai2_wins += 1
         else:
             draws += 1
 
+        move_count = record["moves"]
         total_moves += move_count
         game_lengths.append(move_count)
-        
-        if verbose:
-            print(f"  Game {game_num+1} - Winner: {'Player 1' if winner == 0 else 'Player 2' if winner == 1 else 'Draw'}")
-            print(f"  Score: Player 1: {player1_score}, Player 2: {player2_score}")
-            print(f"  Moves: {move_count}, Captures: P1={game_ai1_captures}, P2={game_ai2_captures}")
-            print(f"  Extra turns: P1={game_ai1_extra_turns}, P2={game_ai2_extra_turns}")
-            print()
+
+        if cached:
+            continue
+
+        # Search costs, from games that were actually played
+        total_time_ai1 += record["move_times"][ai1_seat]
+        total_time_ai2 += record["move_times"][ai2_seat]
+        moves_ai1 += record["move_counts"][ai1_seat]
+        moves_ai2 += record["move_counts"][ai2_seat]
+        nodes_ai1 += record["nodes"][ai1_seat]
+        nodes_ai2 += record["nodes"][ai2_seat]
+        for counter, totals in selective.items():
+            totals[0] += record[counter][ai1_seat]
+            totals[1] += record[counter][ai2_seat]
+
+        # Per-move latencies, split by AI
+        for move_number, (seat, phase, move_time, cpu_time) in enumerate(record["move_latencies"]):
+            ai_number = 1 if seat == ai1_seat else 2
+            if ai_number == 1:
+                latencies_ai1.append((phase, move_time, cpu_time))
+            else:
+                latencies_ai2.append((phase, move_time, cpu_time))
+            move_rows.append((game_num + 1, ai_number, seat + 1, move_number + 1, phase, move_time, cpu_time))
 
     # Calculate additional statistics
     avg_game_length = total_moves / num_games if num_games > 0 else 0
     avg_ai1_score = sum(ai1_scores) / num_games if num_games > 0 else 0
     avg_ai2_score = sum(ai2_scores) / num_games if num_games > 0 else 0
     
-    # Average move time (handle case where no moves were made)
-    avg_time_ai1 = total_time_ai1 / total_moves if total_moves > 0 else 0
-    avg_time_ai2 = total_time_ai2 / total_moves if total_moves > 0 else 0
+    # Average move time over each AI's own moves (handle case where no moves were made)
+    avg_time_ai1 = total_time_ai1 / moves_ai1 if moves_ai1 > 0 else 0
+    avg_time_ai2 = total_time_ai2 / moves_ai2 if moves_ai2 > 0 else 0
+    avg_nodes_ai1 = nodes_ai1 / moves_ai1 if moves_ai1 > 0 else 0
+    avg_nodes_ai2 = nodes_ai2 / moves_ai2 if moves_ai2 > 0 else 0
+    latency_ai1 = _latency_report(latencies_ai1)
+    latency_ai2 = _latency_report(latencies_ai2)
+
+    if csv_path is not None:
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["game", "ai", "player", "move", "phase", "wall_time", "cpu_time"])
+            writer.writerows(move_rows)
     
     # Calculate standard deviation of game lengths
     mean_length = avg_game_length
@@ -130,10 +428,10 @@ def benchmark_ai(ai1, ai2, num_games=50, verbose=False):
     
     # Print benchmark results
     print("-" * 80)
-    print(f"AI 1: {ai1.__class__.__name__} (Depth {ai1.max_depth})")
-    print(f"AI 2: {ai2.__class__.__name__} (Depth {ai2.max_depth})")
+    print(f"AI 1: {spec1['engine']} (Depth {spec1['max_depth']}, weights {tuple(spec1['weights'])})")
+    print(f"AI 2: {spec2['engine']} (Depth {spec2['max_depth']}, weights {tuple(spec2['weights'])})")
     print("-" * 80)
-    print(f"Games played: {num_games}")
+    print(f"Games played: {num_games} ({num_games - cached_games} unique, {cached_games} cached)")
     print(f"AI 1 wins: {ai1_wins} ({ai1_wins / num_games:.2%})")
     print(f"AI 2 wins: {ai2_wins} ({ai2_wins / num_games:.2%})")
     print(f"Draws: {draws} ({draws / num_games:.2%})")
@@ -152,6 +450,22 @@ def benchmark_ai(ai1, ai2, num_games=50, verbose=False):
     print()
     print(f"AI 1 avg move time: {avg_time_ai1:.4f} sec")
     print(f"AI 2 avg move time: {avg_time_ai2:.4f} sec")
+    print()
+    print(f"AI 1 avg nodes per move: {avg_nodes_ai1:.0f}")
+    print(f"AI 2 avg nodes per move: {avg_nodes_ai2:.0f}")
+    for label, index, moves in (("AI 1", 0, moves_ai1), ("AI 2", 1, moves_ai2)):
+        if any(totals[index] for totals in selective.values()):
+            per_move = [totals[index] / moves if moves > 0 else 0 for totals in selective.values()]
+            print(f"{label} per move: {per_move[0]:.1f} reductions, {per_move[1]:.1f} re-searches, "
+                  f"{per_move[2]:.1f} futility prunes")
+    print()
+    print(f"{'Move latency (sec)':<24} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for label, report in (("AI 1", latency_ai1), ("AI 2", latency_ai2)):
+        for phase in ("all",) + PHASES:
+            stats = report["wall"][phase]
+            if stats["count"] == 0:
+                continue
+            print(f"{label + ' ' + phase:<24} {stats['p50']:>8.4f} {stats['p90']:>8.4f} {stats['p99']:>8.4f} {stats['max']:>8.4f}")
     print("-" * 80)
     
     return {
@@ -165,253 +479,479 @@ def benchmark_ai(ai1, ai2, num_games=50, verbose=False):
         'avg_score_ai2': avg_ai2_score,
         'avg_time_ai1': avg_time_ai1,
         'avg_time_ai2': avg_time_ai2,
+        'nodes_ai1': nodes_ai1,
+        'nodes_ai2': nodes_ai2,
+        'avg_nodes_ai1': avg_nodes_ai1,
+        'avg_nodes_ai2': avg_nodes_ai2,
+        **{f'{counter}_ai{index + 1}': totals[index]
+           for counter, totals in selective.items() for index in (0, 1)},
         'captures_ai1': ai1_captures,
         'captures_ai2': ai2_captures,
         'extra_turns_ai1': ai1_extra_turns,
-        'extra_turns_ai2': ai2_extra_turns
+        'extra_turns_ai2': ai2_extra_turns,
+        'games_played': num_games,
+        'cached_games': cached_games,
+        'latency_ai1': latency_ai1,
+        'latency_ai2': latency_ai2
     }
 
 
-# Define custom AI variants for testing
-class StoreWeightedAI(KalahaAI):
-    """AI that puts higher priority on storing seeds."""
-    def _evaluate(self, game):
-        board = game.board
-        
-        # If game is over, assign large values based on the winner
-        if game.game_over:
-            winner = game.get_winner()
-            if winner == game.current_player:
-                return 1000
-            elif winner is not None:
-                return -1000
-            else:
-                return 0
-        
-        # Store values (even higher priority)
-        player_store = board[board.get_player_store(game.current_player)]
-        opponent_store = board[board.get_player_store(1 - game.current_player)]
-        
-        # Seeds in pits
-        player_seeds = sum(board[i] for i in board.get_player_pits_range(game.current_player))
-        opponent_seeds = sum(board[i] for i in board.get_player_pits_range(1 - game.current_player))
-        
-        # Extra turn opportunities
-        extra_turns = 0
-        for pit in range(game.board.pits):
-            actual_idx = pit if game.current_player == 0 else pit + game.board.pits + 1
-            if actual_idx + board[actual_idx] == board.get_player_store(game.current_player):
-                extra_turns += 1
-        
-        # Capturing moves
-        capture_score = 0
-        for pit in range(game.board.pits):
-            if game.can_capture(pit):
-                capture_score += 1
-        
-        # Heavily weight the store difference
-        return (
-            15 * (player_store - opponent_store) +  # Increased from 10 to 15
-            2 * (player_seeds - opponent_seeds) +
-            4 * extra_turns +
-            6 * capture_score
-        )
-
-class ExtraTurnPrioritizedAI(KalahaAI):
-    """AI that prioritizes moves that lead to extra turns."""
-    def _evaluate(self, game):
-        board = game.board
-        
-        # If game is over, assign large values based on the winner
-        if game.game_over:
-            winner = game.get_winner()
-            if winner == game.current_player:
-                return 1000
-            elif winner is not None:
-                return -1000
-            else:
-                return 0
-        
-        # Store values
-        player_store = board[board.get_player_store(game.current_player)]
-        opponent_store = board[board.get_player_store(1 - game.current_player)]
-        
-        # Seeds in pits
-        player_seeds = sum(board[i] for i in board.get_player_pits_range(game.current_player))
-        opponent_seeds = sum(board[i] for i in board.get_player_pits_range(1 - game.current_player))
-        
-        # Extra turn opportunities (heavily weighted)
-        extra_turns = 0
-        for pit in range(game.board.pits):
-            actual_idx = pit if game.current_player == 0 else pit + game.board.pits + 1
-            if actual_idx + board[actual_idx] == board.get_player_store(game.current_player):
-                extra_turns += 1
-        
-        # Capturing moves
-        capture_score = 0
-        for pit in range(game.board.pits):
-            if game.can_capture(pit):
-                capture_score += 1
-        
-        # Heavily weight extra turns
-        return (
-            10 * (player_store - opponent_store) +
-            2 * (player_seeds - opponent_seeds) +
-            10 * extra_turns +  # Increased from 4 to 10
-            6 * capture_score
-        )
-
-class CapturePrioritizedAI(KalahaAI):
-    """AI that prioritizes capturing opponent's seeds."""
-    def _evaluate(self, game):
-        board = game.board
-        
-        # If game is over, assign large values based on the winner
-        if game.game_over:
-            winner = game.get_winner()
-            if winner == game.current_player:
-                return 1000
-            elif winner is not None:
-                return -1000
-            else:
-                return 0
-        
-        # Store values
-        player_store = board[board.get_player_store(game.current_player)]
-        opponent_store = board[board.get_player_store(1 - game.current_player)]
-        
-        # Seeds in pits
-        player_seeds = sum(board[i] for i in board.get_player_pits_range(game.current_player))
-        opponent_seeds = sum(board[i] for i in board.get_player_pits_range(1 - game.current_player))
-        
-        # Extra turn opportunities
-        extra_turns = 0
-        for pit in range(game.board.pits):
-            actual_idx = pit if game.current_player == 0 else pit + game.board.pits + 1
-            if actual_idx + board[actual_idx] == board.get_player_store(game.current_player):
-                extra_turns += 1
-        
-        # Capturing moves (heavily weighted)
-        capture_score = 0
-        for pit in range(game.board.pits):
-            if game.can_capture(pit):
-                capture_score += 1
-        
-        # Heavily weight capture opportunities
-        return (
-            10 * (player_store - opponent_store) +
-            2 * (player_seeds - opponent_seeds) +
-            4 * extra_turns +
-            12 * capture_score  # Increased from 6 to 12
-        )
+# Evaluation weight variants for testing, as (store difference, seed difference,
+# extra turn moves, capturing moves). The default weights are DEFAULT_WEIGHTS.
+STORE_WEIGHTED_WEIGHTS = (15, 2, 4, 6)
+EXTRA_TURN_WEIGHTS = (10, 2, 10, 6)
+CAPTURE_WEIGHTS = (10, 2, 4, 12)
+
+
+# Board sizes swept by the scaling benchmark, as (pits, seeds)
+SCALING_SIZES = [(4, 3), (4, 4), (5, 4), (6, 3), (6, 4), (6, 6), (7, 5), (8, 6), (8, 8)]
+
+
+def _sample_positions(num_positions, pits, seeds, rng_seed=0):
+    """Collect positions from random games, for cost measurements over whole games."""
+    rng = random.Random(rng_seed)
+    positions = []
+    while len(positions) < num_positions:
+        game = Game(pits, seeds)
+        while not game.game_over and len(positions) < num_positions:
+            positions.append(game.clone())
+            game.make_move(rng.choice(game.get_possible_moves()))
+    return positions
+
+
+def measure_scaling(pits, seeds, max_depth=7, num_positions=500, num_games=10, depth_time_limit=10.0,
+                    game_depth=3, rng_seed=0):
+    """Measure the engine's cost on one board size.
+
+    Args:
+        pits (int): Number of pits per player.
+        seeds (int): Initial number of seeds per pit.
+        max_depth (int): Deepest search timed from the start position.
+        num_positions (int): Positions from random games used for move generation and sowing.
+        num_games (int): Self-play games used for the average game length.
+        depth_time_limit (float): Deepening stops once one depth takes longer than this.
+        game_depth (int): Search depth of the self-play games.
+        rng_seed (int): Seed of the random games and openings.
+
+    Returns:
+        dict: Moves generated per second, microseconds per sowing with and without
+            the generated kernels, search nodes per second, search speedup of the
+            kernels, seconds to reach each depth and average game length in plies.
+            Kernel figures are None for board sizes without kernels.
+    """
+    positions = _sample_positions(num_positions, pits, seeds, rng_seed)
+
+    # Move generation
+    start_time = time.perf_counter()
+    generated = sum(len(game.get_possible_moves()) for game in positions)
+    movegen_time = time.perf_counter() - start_time
+
+    # Sowing on a scratch board, so the cost of copying games is left out
+    sowings = [(game.board.get_state(), game.current_player, move)
+               for game in positions for move in game.get_possible_moves()]
+    board = Board(pits, seeds)
+    start_time = time.perf_counter()
+    for state, player, move in sowings:
+        board.state = state.copy()
+        Move(player, move).execute(board)
+    sow_time = time.perf_counter() - start_time
+    copy_start = time.perf_counter()
+    for state, _, _ in sowings:
+        board.state = state.copy()
+    copy_time = time.perf_counter() - copy_start
+    sow_time -= copy_time
+
+    # The same sowings with the generated kernels, if this size has them
+    kernels = (Kernels.get_kernel(pits, 0), Kernels.get_kernel(pits, 1))
+    kernel_sow_time = None
+    if None not in kernels:
+        start_time = time.perf_counter()
+        for state, player, move in sowings:
+            kernels[player].move(state.copy(), move)
+        kernel_sow_time = time.perf_counter() - start_time - copy_time
+
+    # Search speed and time to depth from the start position
+    time_to_depth = {}
+    nodes = 0
+    search_time = 0.0
+    for depth in range(1, max_depth + 1):
+        ai = KalahaAI(max_depth=depth)
+        start_time = time.perf_counter()
+        ai.search(Game(pits, seeds))
+        elapsed = time.perf_counter() - start_time
+        time_to_depth[depth] = elapsed
+        nodes += ai.nodes
+        search_time += elapsed
+        if elapsed > depth_time_limit:
+            break
+
+    # Search speedup of the kernels, on the deepest search that took at most a second
+    kernel_speedup = None
+    if kernel_sow_time is not None:
+        compare_depth = max([depth for depth, elapsed in time_to_depth.items() if elapsed <= 1.0] or [1])
+        Kernels.enabled = False
+        try:
+            start_time = time.perf_counter()
+            KalahaAI(max_depth=compare_depth).search(Game(pits, seeds))
+            generic_time = time.perf_counter() - start_time
+        finally:
+            Kernels.enabled = True
+        kernel_speedup = generic_time / time_to_depth[compare_depth] if time_to_depth[compare_depth] > 0 else 0
+
+    # Game length of engine self-play from random openings
+    ai = KalahaAI(max_depth=game_depth)
+    openings = generate_openings(num_games, plies=2, pits=pits, seeds=seeds, rng_seed=rng_seed)
+    lengths = [len(opening) + play_game(ai, ai, opening, pits, seeds)["moves"] for opening in openings]
+
+    return {
+        "pits": pits,
+        "seeds": seeds,
+        "moves_per_sec": generated / movegen_time if movegen_time > 0 else 0,
+        "sow_us": 1e6 * sow_time / len(sowings) if sowings else 0,
+        "kernel_sow_us": 1e6 * kernel_sow_time / len(sowings) if kernel_sow_time is not None and sowings else None,
+        "nodes_per_sec": nodes / search_time if search_time > 0 else 0,
+        "kernel_speedup": kernel_speedup,
+        "time_to_depth": time_to_depth,
+        "avg_game_length": sum(lengths) / len(lengths) if lengths else 0
+    }
+
+
+def scaling_benchmark(sizes=SCALING_SIZES, max_depth=7, csv_path=None, **options):
+    """Sweep board sizes, print a table of engine costs and optionally write a CSV.
+
+    Args:
+        sizes (list): (pits, seeds) configurations.
+        max_depth (int): Deepest search timed per configuration.
+        csv_path (str): Optional CSV file with one row per configuration.
+        **options: Further arguments of measure_scaling.
+
+    Returns:
+        list: One measure_scaling result per configuration.
+    """
+    depth_columns = [f"depth_{depth}_sec" for depth in range(1, max_depth + 1)]
+
+    print(f"{'Size':<6} {'Moves/s':>10} {'Sow us':>8} {'Kernel us':>9} {'Nodes/s':>10} {'Kernel x':>8} "
+          f"{'Plies':>6}  Seconds to depth 1..{max_depth}")
+    print("-" * 100)
+
+    results = []
+    for pits, seeds in sizes:
+        result = measure_scaling(pits, seeds, max_depth=max_depth, **options)
+        results.append(result)
+        depths = " ".join(f"{result['time_to_depth'][depth]:.3f}" for depth in sorted(result["time_to_depth"]))
+        kernel_sow = "-" if result["kernel_sow_us"] is None else f"{result['kernel_sow_us']:.2f}"
+        speedup = "-" if result["kernel_speedup"] is None else f"{result['kernel_speedup']:.2f}"
+        print(f"{pits}x{seeds:<4} {result['moves_per_sec']:>10.0f} {result['sow_us']:>8.2f} {kernel_sow:>9} "
+              f"{result['nodes_per_sec']:>10.0f} {speedup:>8} {result['avg_game_length']:>6.1f}  {depths}")
+
+    if csv_path:
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["pits", "seeds", "moves_per_sec", "sow_us", "kernel_sow_us", "nodes_per_sec",
+                             "kernel_speedup", "avg_game_length"] + depth_columns)
+            for result in results:
+                writer.writerow([result["pits"], result["seeds"], result["moves_per_sec"], result["sow_us"],
+                                 result["kernel_sow_us"], result["nodes_per_sec"], result["kernel_speedup"],
+                                 result["avg_game_length"]]
+                                + [result["time_to_depth"].get(depth, "") for depth in range(1, max_depth + 1)])
 
-class NoMoveOrderingAI(KalahaAI):
-    """AI without move ordering optimization."""
-    def _order_moves(self, game, moves):
-        """Return moves without any ordering."""
-        return moves  # No sorting, just return the original moves
+    return results
+
+
+def parse_sizes(text):
+    """Parse board sizes such as '4x3,6x4,8x8' into (pits, seeds) tuples."""
+    sizes = []
+    for size in text.split(","):
+        pits, seeds = size.lower().split("x")
+        sizes.append((int(pits), int(seeds)))
+    return sizes
+
+
+def make_job(name, ai1, ai2, num_openings=25, plies=4, rng_seed=0, section=None, pits=6, seeds=4):
+    """Describe one benchmark matchup as a job that can be run from a fresh process.
+
+    Args:
+        name (str): Label of the matchup in the results.
+        ai1: First AI instance (only its spec is kept).
+        ai2: Second AI instance (only its spec is kept).
+        num_openings (int): Openings in the suite; each is played twice.
+        plies (int): Random moves per opening.
+        rng_seed (int): Seed of the opening generator.
+        section (str): Suite section the job belongs to.
+        pits (int): Number of pits per player.
+        seeds (int): Initial number of seeds per pit.
+
+    Returns:
+        dict: The job, with 'key' identifying it by engine specs, board, games and seeds.
+    """
+    job = {
+        "name": name,
+        "section": section,
+        "ai1": ai1.get_spec(),
+        "ai2": ai2.get_spec(),
+        "num_openings": num_openings,
+        "plies": plies,
+        "rng_seed": rng_seed,
+        "pits": pits,
+        "seeds": seeds,
+    }
+    job["key"] = json.dumps(
+        [job["ai1"], job["ai2"], num_openings, plies, rng_seed, pits, seeds], sort_keys=True
+    )
+    return job
+
+
+class BenchmarkJournal:
+    """Append-only JSON lines file recording the progress of suite jobs.
+
+    Every job writes a 'started' line before it runs and a 'done' line with
+    its results afterwards. A job with only a 'started' line was interrupted
+    and is run again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.results = {}
+        self.partial = set()
+
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Line cut short by a crash
+                    if entry["status"] == "done":
+                        self.results[entry["key"]] = entry["results"]
+                        self.partial.discard(entry["key"])
+                    elif entry["key"] not in self.results:
+                        self.partial.add(entry["key"])
+
+    def _append(self, entry):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def start(self, job):
+        self._append({"key": job["key"], "name": job["name"], "status": "started", "time": time.time()})
+
+    def finish(self, job, results):
+        self.results[job["key"]] = results
+        self._append({"key": job["key"], "name": job["name"], "status": "done", "time": time.time(),
+                      "results": results})
+
+
+def _format_duration(seconds):
+    """Format a duration in seconds as h:mm:ss."""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def run_suite(jobs, journal_path, cache_path=None):
+    """Run benchmark jobs, skipping the ones already completed in the journal.
+
+    Progress and ETA are based on the games per second measured in this run.
+
+    Args:
+        jobs (list): Jobs from make_job.
+        journal_path (str): Journal file used to resume an interrupted suite.
+        cache_path (str): Optional position cache file, so searches done by an
+            earlier run are answered from the cache.
+
+    Returns:
+        dict: Results of every job, keyed by job name.
+    """
+    journal = BenchmarkJournal(journal_path)
+    pending = [job for job in jobs if job["key"] not in journal.results]
+    skipped = len(jobs) - len(pending)
+    if skipped:
+        print(f"Resuming: {skipped} of {len(jobs)} jobs already completed in {journal_path}")
+    rerun = sum(1 for job in pending if job["key"] in journal.partial)
+    if rerun:
+        print(f"Re-running {rerun} interrupted job(s)")
+
+    total_games = sum(2 * job["num_openings"] for job in pending)
+    state = {"games": 0, "start": time.perf_counter()}
+
+    def report(games_done, job_games, job_index, job):
+        done = state["games"] + games_done
+        elapsed = time.perf_counter() - state["start"]
+        rate = done / elapsed if elapsed > 0 else 0
+        eta = (total_games - done) / rate if rate > 0 else 0
+        print(f"\r[job {job_index}/{len(pending)}: {job['name']}] game {games_done}/{job_games} | "
+              f"{done}/{total_games} games, {rate:.2f} games/s, ETA {_format_duration(eta)}",
+              end="\n" if games_done == job_games else "", flush=True)
+
+    position_cache = PositionCache(cache_path) if cache_path is not None else None
+    section = None
+    for job_index, job in enumerate(pending, start=1):
+        if job["section"] != section:
+            section = job["section"]
+            print(f"\n{section}\n")
+
+        print(job["name"])
+        openings = generate_openings(job["num_openings"], plies=job["plies"], pits=job["pits"],
+                                     seeds=job["seeds"], rng_seed=job["rng_seed"])
+        ai1 = make_engine(job["ai1"])
+        ai2 = make_engine(job["ai2"])
+        ai1.position_cache = ai2.position_cache = position_cache
+
+        journal.start(job)
+        try:
+            results = benchmark_ai(
+                ai1, ai2, openings=openings, pits=job["pits"], seeds=job["seeds"],
+                progress=lambda done, games: report(done, games, job_index, job)
+            )
+        finally:
+            # Engines with helper processes or shared memory release them
+            for engine in (ai1, ai2):
+                if hasattr(engine, 'close'):
+                    engine.close()
+        journal.finish(job, results)
+        state["games"] += results["games_played"]
+        if position_cache is not None:
+            position_cache.flush()  # Completed jobs keep their searches if the suite is interrupted
+
+    if position_cache is not None:
+        print(f"Position cache: {position_cache.hits} hits, {position_cache.misses} misses")
+        position_cache.close()
+
+    return {job["name"]: journal.results[job["key"]] for job in jobs}
 
 
 def main():
     """Main function to run benchmarks."""
-    # Configure the number of games for each benchmark
-    games_per_benchmark = 50
+    parser = argparse.ArgumentParser(description="Kalaha AI benchmark suite")
+    parser.add_argument("--journal", default="benchmark_journal.jsonl",
+                        help="Journal of completed jobs, used to resume an interrupted suite")
+    parser.add_argument("--fresh", action="store_true", help="Ignore and replace an existing journal")
+    parser.add_argument("--openings", type=int, default=25,
+                        help="Openings per benchmark (each is played twice, colors swapped)")
+    parser.add_argument("--scaling", action="store_true",
+                        help="Run the board-size scaling benchmark instead of the match suite")
+    parser.add_argument("--sizes", type=parse_sizes, default=SCALING_SIZES,
+                        help="Board sizes of the scaling benchmark, e.g. 4x3,6x4,8x8")
+    parser.add_argument("--max-depth", type=int, default=7, help="Deepest search timed by the scaling benchmark")
+    parser.add_argument("--csv", default=None, help="CSV file for the scaling benchmark results")
+    parser.add_argument("--cache", default=None,
+                        help="Position cache file; searches of earlier runs are answered from it")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiler = profiler_from_args(args)
+    
+    if args.scaling:
+        if profiler is not None:
+            profiler.start()
+        try:
+            scaling_benchmark(args.sizes, args.max_depth, args.csv)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+        if profiler is not None:
+            print()
+            finish_profile(profiler, args.profile)
+        return
+
+    if args.fresh and os.path.exists(args.journal):
+        os.remove(args.journal)
+
+    num_openings = args.openings
     
     print("=" * 80)
     print("KALAHA AI BENCHMARK SUITE")
     print("=" * 80)
-    print(f"Games per benchmark: {games_per_benchmark}")
+    print(f"Games per benchmark: {2 * num_openings} ({num_openings} openings, colors swapped)")
+    print(f"Journal: {args.journal}")
     print()
     
-    # Store results for later analysis
-    all_results = {}
+    jobs = []
     
     # 1. Search Depth Comparison
-    print("\n1. SEARCH DEPTH COMPARISON\n")
+    section = "1. SEARCH DEPTH COMPARISON"
     depths = [3, 5, 7, 9]  # Test different search depths
     
     for i, depth1 in enumerate(depths):
         for depth2 in depths[i+1:]:
-            print(f"Testing Depth {depth1} vs Depth {depth2}")
-            ai1 = KalahaAI(max_depth=depth1)
-            ai2 = KalahaAI(max_depth=depth2)
-            results = benchmark_ai(ai1, ai2, num_games=games_per_benchmark)
-            all_results[f"Depth {depth1} vs Depth {depth2}"] = results
+            jobs.append(make_job(f"Depth {depth1} vs Depth {depth2}",
+                                 KalahaAI(max_depth=depth1), KalahaAI(max_depth=depth2),
+                                 num_openings, section=section))
     
     # 2. Evaluation Function Comparison
-    print("\n2. EVALUATION FUNCTION COMPARISON\n")
-    
-    # Default vs Store-Weighted
-    print("Default AI vs Store-Weighted AI")
-    ai1 = KalahaAI(max_depth=5)
-    ai2 = StoreWeightedAI(max_depth=5)
-    results = benchmark_ai(ai1, ai2, num_games=games_per_benchmark)
-    all_results["Default vs Store-Weighted"] = results
-    
-    # Default vs Extra Turn-Oriented
-    print("Default AI vs Extra Turn-Oriented AI")
-    ai1 = KalahaAI(max_depth=5)
-    ai2 = ExtraTurnPrioritizedAI(max_depth=5)
-    results = benchmark_ai(ai1, ai2, num_games=games_per_benchmark)
-    all_results["Default vs Extra Turn-Oriented"] = results
-    
-    # Default vs Capture-Oriented
-    print("Default AI vs Capture-Oriented AI")
-    ai1 = KalahaAI(max_depth=5)
-    ai2 = CapturePrioritizedAI(max_depth=5)
-    results = benchmark_ai(ai1, ai2, num_games=games_per_benchmark)
-    all_results["Default vs Capture-Oriented"] = results
+    section = "2. EVALUATION FUNCTION COMPARISON"
+    jobs.append(make_job("Default vs Store-Weighted",
+                         KalahaAI(max_depth=5), KalahaAI(max_depth=5, weights=STORE_WEIGHTED_WEIGHTS),
+                         num_openings, section=section))
+    jobs.append(make_job("Default vs Extra Turn-Oriented",
+                         KalahaAI(max_depth=5), KalahaAI(max_depth=5, weights=EXTRA_TURN_WEIGHTS),
+                         num_openings, section=section))
+    jobs.append(make_job("Default vs Capture-Oriented",
+                         KalahaAI(max_depth=5), KalahaAI(max_depth=5, weights=CAPTURE_WEIGHTS),
+                         num_openings, section=section))
     
     # 3. Move Ordering Efficiency
-    print("\n3. MOVE ORDERING EFFICIENCY\n")
-    
-    print("AI with Move Ordering vs AI without Move Ordering")
-    ai1 = KalahaAI(max_depth=5)
-    ai2 = NoMoveOrderingAI(max_depth=5)
-    results = benchmark_ai(ai1, ai2, num_games=games_per_benchmark)
-    all_results["Move Ordering vs No Move Ordering"] = results
+    section = "3. MOVE ORDERING EFFICIENCY"
+    jobs.append(make_job("Move Ordering vs No Move Ordering",
+                         KalahaAI(max_depth=5), NoMoveOrderingAI(max_depth=5),
+                         num_openings, section=section))
     
     # 4. Randomness Effect
-    print("\n4. RANDOMNESS EFFECT\n")
+    section = "4. RANDOMNESS EFFECT"
+    jobs.append(make_job("Deterministic vs Random",
+                         KalahaAI(max_depth=5), RandomKalahaAI(max_depth=5),
+                         num_openings, section=section))
     
-    print("Deterministic AI vs Random AI")
-    ai1 = KalahaAI(max_depth=5)
-    ai2 = RandomKalahaAI(max_depth=5)
-    results = benchmark_ai(ai1, ai2, num_games=games_per_benchmark)
-    all_results["Deterministic vs Random"] = results
+    # 5. Selective search: node savings against the full-width search
+    section = "5. SELECTIVE SEARCH"
+    jobs.append(make_job("Full Width vs Late Move Reductions",
+                         KalahaAI(max_depth=7), KalahaAI(max_depth=7, lmr=True),
+                         num_openings, section=section))
+    jobs.append(make_job("Full Width vs Futility Pruning",
+                         KalahaAI(max_depth=7), KalahaAI(max_depth=7, futility=True),
+                         num_openings, section=section))
+    jobs.append(make_job("Full Width vs Both",
+                         KalahaAI(max_depth=7), KalahaAI(max_depth=7, lmr=True, futility=True),
+                         num_openings, section=section))
     
-    # 5. Head-to-Head champion tournament
-    print("\n5. CHAMPION TOURNAMENT\n")
+    # 6. Head-to-Head champion tournament
+    section = "6. CHAMPION TOURNAMENT"
     
     # Create the champions with equal depths
     depth = 5
     champions = [
         ("Default", KalahaAI(max_depth=depth)),
-        ("Store-Weighted", StoreWeightedAI(max_depth=depth)),
-        ("Extra-Turn", ExtraTurnPrioritizedAI(max_depth=depth)),
-        ("Capture", CapturePrioritizedAI(max_depth=depth)),
+        ("Store-Weighted", KalahaAI(max_depth=depth, weights=STORE_WEIGHTED_WEIGHTS)),
+        ("Extra-Turn", KalahaAI(max_depth=depth, weights=EXTRA_TURN_WEIGHTS)),
+        ("Capture", KalahaAI(max_depth=depth, weights=CAPTURE_WEIGHTS)),
         ("Random", RandomKalahaAI(max_depth=depth))
     ]
     
-    # Tournament results
-    tournament_results = {name: {"wins": 0, "games": 0} for name, _ in champions}
-    
-    print(f"Running tournament with {len(champions)} AI variants...")
-    
     # Play all combinations
+    tournament_jobs = []
     for i, (name1, ai1) in enumerate(champions):
         for j, (name2, ai2) in enumerate(champions):
             if i >= j:  # Skip self-matches and repeated matches
                 continue
-                
-            print(f"{name1} vs {name2}")
-            results = benchmark_ai(ai1, ai2, num_games=games_per_benchmark)
-            
-            # Update tournament results
-            tournament_results[name1]["wins"] += results["ai1_wins"]
-            tournament_results[name2]["wins"] += results["ai2_wins"]
-            tournament_results[name1]["games"] += games_per_benchmark
-            tournament_results[name2]["games"] += games_per_benchmark
+            job = make_job(f"Tournament: {name1} vs {name2}", ai1, ai2, num_openings, section=section)
+            jobs.append(job)
+            tournament_jobs.append((name1, name2, job))
+    
+    if profiler is not None:
+        profiler.start()
+    try:
+        all_results = run_suite(jobs, args.journal, cache_path=args.cache)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+    
+    # Tournament results
+    tournament_results = {name: {"wins": 0, "games": 0} for name, _ in champions}
+    for name1, name2, job in tournament_jobs:
+        results = all_results[job["name"]]
+        tournament_results[name1]["wins"] += results["ai1_wins"]
+        tournament_results[name2]["wins"] += results["ai2_wins"]
+        tournament_results[name1]["games"] += results["games_played"]
+        tournament_results[name2]["games"] += results["games_played"]
     
     # Print tournament rankings
     print("\nTOURNAMENT RANKINGS")
@@ -430,8 +970,12 @@ def main():
         win_rate = stats["wins"] / stats["games"] if stats["games"] > 0 else 0
         print(f"{name:<20} {win_rate:.4f}    {stats['wins']:<8} {stats['games']:<8}")
     
+    if profiler is not None:
+        print()
+        finish_profile(profiler, args.profile)
+    
     print("\nBenchmark completed!")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -42,6 +42,20 @@ class Board:
         else:
             return range(self.pits + 1, 2 * self.pits + 1)
             
+    def get_canonical_state(self, player):
+        """Return the board as seen by a player: their pits and store first.
+        
+        A position with player 0 to move is the mirror image of the position
+        with the sides swapped and player 1 to move, so both give the same tuple.
+        """
+        if player == 0:
+            return tuple(self.state)
+        return tuple(self.state[self.pits + 1:] + self.state[:self.pits + 1])
+    
+    def get_seeds_in_play(self):
+        """Return the number of seeds still on the pits, outside both stores."""
+        return sum(self.state) - self.state[self.pits] - self.state[2 * self.pits + 1]
+    
     def get_opposite_pit(self, pit):
         """Get the opposite pit index for a given pit."""
         if 0 <= pit < self.pits or self.pits + 1 <= pit < 2 * self.pits + 1:
@@ -0,0 +1,351 @@
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import socketserver
+import multiprocessing
+from collections import deque
+from AI import make_engine
+from Benchmark import generate_openings, play_game, summarize_games
+
+# Protocol: newline-delimited JSON messages over TCP.
+#   worker -> coordinator: {"type": "request"}, {"type": "heartbeat"},
+#                          {"type": "result", "id": ..., "record": ...}
+#   coordinator -> worker: {"type": "job", "job": ...}, {"type": "wait", "seconds": ...},
+#                          {"type": "done"}
+# The coordinator only answers requests, so a worker reads exactly one reply
+# per request while its heartbeat thread writes independently.
+
+
+def _send(sock, message, lock=None):
+    """Send one JSON message, holding the lock if several threads share the socket."""
+    data = (json.dumps(message) + "\n").encode()
+    if lock is None:
+        sock.sendall(data)
+    else:
+        with lock:
+            sock.sendall(data)
+
+
+class _CoordinatorHandler(socketserver.StreamRequestHandler):
+    """Serves one worker connection."""
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        worker = coordinator._register()
+        try:
+            for line in self.rfile:
+                message = json.loads(line)
+                kind = message["type"]
+                if kind == "request":
+                    _send(self.request, coordinator._next_job(worker))
+                elif kind == "heartbeat":
+                    coordinator._heartbeat(worker)
+                elif kind == "result":
+                    coordinator._finish(worker, message["id"], message["record"])
+        except (OSError, ValueError):
+            pass  # A broken connection is handled like a lost worker
+        finally:
+            coordinator._drop_worker(worker)
+
+
+class _CoordinatorServer(socketserver.ThreadingTCPServer):
+    """TCP server of a coordinator; a restarted coordinator can rebind its port at once."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class Coordinator:
+    """Hands out game jobs to workers over TCP and collects their results.
+
+    Workers that disconnect, or stop sending heartbeats for heartbeat_timeout
+    seconds, are considered lost and their jobs go back to the queue. If a lost
+    worker still delivers a result later, the first result for a job wins.
+    """
+
+    def __init__(self, jobs, host="127.0.0.1", port=0, heartbeat_timeout=10.0):
+        """Initialize the coordinator and bind its server socket.
+
+        Args:
+            jobs (list): Job dicts with a unique 'id' each
+            host (str): Address to listen on
+            port (int): Port to listen on (0 picks a free port)
+            heartbeat_timeout (float): Seconds without a heartbeat after which a worker is lost
+        """
+        self.total = len(jobs)
+        self.pending = deque(jobs)
+        self.results = {}
+        self.assigned = {}  # Job id -> (job, worker)
+        self.last_seen = {}  # Worker -> time of its last message
+        self.requeued = 0
+        self.heartbeat_timeout = heartbeat_timeout
+        self._next_worker = 0
+        self._condition = threading.Condition()
+
+        self.server = _CoordinatorServer((host, port), _CoordinatorHandler)
+        self.server.coordinator = self
+        self.address = self.server.server_address
+
+    def start(self):
+        """Start serving workers and watching heartbeats in background threads."""
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._reap, daemon=True).start()
+
+    def wait(self, progress=None):
+        """Block until every job has a result.
+
+        Args:
+            progress (callable): Optional function called as progress(done, total)
+                whenever results arrive
+
+        Returns:
+            dict: Result record per job id
+        """
+        with self._condition:
+            while len(self.results) < self.total:
+                self._condition.wait(1.0)
+                if progress is not None:
+                    progress(len(self.results), self.total)
+            return dict(self.results)
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _register(self):
+        with self._condition:
+            worker = self._next_worker
+            self._next_worker += 1
+            self.last_seen[worker] = time.monotonic()
+            return worker
+
+    def _heartbeat(self, worker):
+        with self._condition:
+            self.last_seen[worker] = time.monotonic()
+
+    def _next_job(self, worker):
+        """Return the reply to a job request."""
+        with self._condition:
+            self.last_seen[worker] = time.monotonic()
+            if len(self.results) >= self.total:
+                return {"type": "done"}
+            if not self.pending:
+                # Jobs of lost workers may still come back to the queue
+                return {"type": "wait", "seconds": 0.5}
+            job = self.pending.popleft()
+            self.assigned[job["id"]] = (job, worker)
+            return {"type": "job", "job": job}
+
+    def _finish(self, worker, job_id, record):
+        with self._condition:
+            self.last_seen[worker] = time.monotonic()
+            self.assigned.pop(job_id, None)
+            if job_id not in self.results:
+                self.results[job_id] = record
+            self._condition.notify_all()
+
+    def _drop_worker(self, worker):
+        """Put the unfinished jobs of a lost worker back at the front of the queue."""
+        with self._condition:
+            self.last_seen.pop(worker, None)
+            for job_id, (job, owner) in list(self.assigned.items()):
+                if owner == worker and job_id not in self.results:
+                    del self.assigned[job_id]
+                    self.pending.appendleft(job)
+                    self.requeued += 1
+
+    def _reap(self):
+        """Drop workers whose heartbeats stopped."""
+        while True:
+            time.sleep(self.heartbeat_timeout / 4)
+            now = time.monotonic()
+            with self._condition:
+                lost = [worker for worker, seen in self.last_seen.items() if now - seen > self.heartbeat_timeout]
+            for worker in lost:
+                self._drop_worker(worker)
+
+
+def _play_job(job, engines):
+    """Play the game of a job, reusing engines created for earlier jobs.
+
+    Returns:
+        dict: Game record from play_game
+    """
+    players = []
+    for spec in job["specs"]:
+        spec = dict(spec)
+        if job.get("budget") is not None:
+            spec["time_budget"] = job["budget"]
+        key = json.dumps(spec, sort_keys=True)
+        if key not in engines:
+            engines[key] = make_engine(spec)
+        players.append(engines[key])
+    return play_game(players[0], players[1], tuple(job["opening"]), job["pits"], job["seeds"])
+
+
+def run_worker(host, port, heartbeat_interval=2.0):
+    """Pull game jobs from a coordinator until it reports that all are done.
+
+    Args:
+        host (str): Coordinator address
+        port (int): Coordinator port
+        heartbeat_interval (float): Seconds between heartbeats
+
+    Returns:
+        int: Number of games played
+    """
+    sock = socket.create_connection((host, port))
+    send_lock = threading.Lock()
+    stopped = threading.Event()
+
+    def beat():
+        while not stopped.wait(heartbeat_interval):
+            try:
+                _send(sock, {"type": "heartbeat"}, send_lock)
+            except OSError:
+                return
+
+    threading.Thread(target=beat, daemon=True).start()
+    engines = {}
+    games = 0
+    replies = sock.makefile("r")
+    try:
+        while True:
+            _send(sock, {"type": "request"}, send_lock)
+            line = replies.readline()
+            if not line:
+                break  # Coordinator went away
+            reply = json.loads(line)
+
+            if reply["type"] == "done":
+                break
+            if reply["type"] == "wait":
+                time.sleep(reply["seconds"])
+                continue
+
+            job = reply["job"]
+            record = _play_job(job, engines)
+            _send(sock, {"type": "result", "id": job["id"], "record": record}, send_lock)
+            games += 1
+    finally:
+        stopped.set()
+        sock.close()
+        for engine in engines.values():
+            if hasattr(engine, "close"):
+                engine.close()
+    return games
+
+
+def distributed_benchmark(ai1, ai2, num_games=50, openings=None, pits=6, seeds=4, budget=None,
+                          local_workers=2, host="127.0.0.1", port=0, heartbeat_timeout=10.0, csv_path=None):
+    """Run a benchmark_ai matchup with games played by socket workers.
+
+    Args:
+        ai1: First AI instance (only its spec is sent to the workers).
+        ai2: Second AI instance, the same as ai1 for self-play.
+        num_games (int): Number of games (ignored when openings are given).
+        openings (list): Optional opening suite; each opening is played twice, colors swapped.
+        pits (int): Number of pits per player.
+        seeds (int): Initial number of seeds per pit.
+        budget (float): Optional time budget per move applied to both engines.
+        local_workers (int): Worker processes started on this machine; with 0 the
+            coordinator waits for workers started elsewhere.
+        host (str): Address the coordinator listens on.
+        port (int): Port the coordinator listens on (0 picks a free port).
+        heartbeat_timeout (float): Seconds without a heartbeat after which a worker is lost.
+        csv_path (str): Optional file receiving one row per move with its latency.
+
+    Returns:
+        dict: Benchmark statistics in the format of benchmark_ai.
+    """
+    spec1, spec2 = ai1.get_spec(), ai2.get_spec()
+    if openings is None:
+        schedule = [((), 0)] * num_games
+    else:
+        schedule = [(tuple(opening), seat) for opening in openings for seat in (0, 1)]
+
+    jobs = []
+    for job_id, (opening, ai1_seat) in enumerate(schedule):
+        specs = [spec1, spec2] if ai1_seat == 0 else [spec2, spec1]
+        jobs.append({"id": job_id, "specs": specs, "opening": list(opening), "pits": pits, "seeds": seeds,
+                     "budget": budget})
+
+    coordinator = Coordinator(jobs, host, port, heartbeat_timeout)
+    coordinator.start()
+    address = coordinator.address
+    print(f"Coordinator listening on {address[0]}:{address[1]} with {len(jobs)} games", file=sys.stderr)
+
+    # Not daemonic, so parallel engines such as LazySMPAI can start their helpers
+    processes = [multiprocessing.Process(target=run_worker, args=address) for _ in range(local_workers)]
+    for process in processes:
+        process.start()
+
+    try:
+        results = coordinator.wait()
+    finally:
+        coordinator.shutdown()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    if coordinator.requeued:
+        print(f"{coordinator.requeued} games were re-queued after losing their worker", file=sys.stderr)
+
+    games = [(opening, ai1_seat, results[job_id], False) for job_id, (opening, ai1_seat) in enumerate(schedule)]
+    return summarize_games(games, spec1, spec2, csv_path)
+
+
+def main():
+    """Run a distributed benchmark coordinator or a worker."""
+    from Main import parse_engine, parse_budget
+
+    parser = argparse.ArgumentParser(description="Distributed Kalaha benchmark and self-play games")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    coordinator = commands.add_parser("coordinator", help="Hand out games and aggregate the results")
+    coordinator.add_argument("--engine1", type=parse_engine, default=parse_engine("KalahaAI:max_depth=5"),
+                             help="Engine spec of the first engine")
+    coordinator.add_argument("--engine2", type=parse_engine, default=None,
+                             help="Engine spec of the second engine (self-play if omitted)")
+    coordinator.add_argument("--openings", type=int, default=10, help="Openings, each played twice")
+    coordinator.add_argument("--budget", type=parse_budget, default=None, help="Time budget per move, e.g. 100ms")
+    coordinator.add_argument("--pits", type=int, default=6, help="Pits per player")
+    coordinator.add_argument("--seeds", type=int, default=4, help="Seeds per pit")
+    coordinator.add_argument("--local-workers", type=int, default=2, help="Workers started on this machine")
+    coordinator.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    coordinator.add_argument("--port", type=int, default=5555, help="Port to listen on")
+    coordinator.add_argument("--output", default=None, help="Write the aggregated results as JSON here")
+
+    worker = commands.add_parser("worker", help="Play games for a coordinator")
+    worker.add_argument("--host", default="127.0.0.1", help="Coordinator address")
+    worker.add_argument("--port", type=int, default=5555, help="Coordinator port")
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        games = run_worker(args.host, args.port)
+        print(f"Worker finished after {games} games", file=sys.stderr)
+        return
+
+    ai1 = make_engine(args.engine1)
+    ai2 = make_engine(args.engine2) if args.engine2 is not None else ai1
+    openings = generate_openings(args.openings, pits=args.pits, seeds=args.seeds)
+    try:
+        results = distributed_benchmark(ai1, ai2, openings=openings, pits=args.pits, seeds=args.seeds,
+                                        budget=args.budget, local_workers=args.local_workers,
+                                        host=args.host, port=args.port)
+    finally:
+        # Only the specs of these engines are used, but they may hold shared memory
+        for engine in {id(ai1): ai1, id(ai2): ai2}.values():
+            if hasattr(engine, "close"):
+                engine.close()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,39 @@
+from collections import namedtuple
 from Board import Board
 from Move import Move
+from Rules import DEFAULT_RULES
+from Kernels import get_kernel
+
+# Compact description of a position reached by one legal move, see Game.expand
+Child = namedtuple('Child', ['move', 'state', 'current_player', 'free_turn', 'capture', 'game_over'])
 
 class Game:
-    def __init__(self, pits=6, seeds=4):
+    def __new__(cls, pits=6, seeds=4, rules=None):
+        # Rule variants get a subclass, so the default game never checks its rules
+        if cls is Game and rules is not None and not rules.is_default():
+            cls = VariantGame
+        return super().__new__(cls)
+    
+    def __init__(self, pits=6, seeds=4, rules=None):
         """Initialize the Kalaha game.
         
         Args:
             pits (int): Number of pits per player (excluding store)
             seeds (int): Initial number of seeds per pit
+            rules (Rules): Rule variant (DEFAULT_RULES if not given)
         """
         self.board = Board(pits, seeds)
         self.current_player = 0  # Player 0 starts
         self.game_over = False
+        self.last_capture = 0  # Seeds captured by the last move
+        self.rules = rules if rules is not None and not rules.is_default() else DEFAULT_RULES
     
     def reset(self):
         """Reset the game to initial state."""
         self.board.reset()
         self.current_player = 0
         self.game_over = False
+        self.last_capture = 0
     
     def get_state(self):
         """Return the current state of the game."""
@@ -35,10 +51,77 @@ class Game:
     
     def clone(self):
         """Create a deep copy of the game."""
-        game_copy = Game(self.board.pits, self.board.seeds)
+        game_copy = Game(self.board.pits, self.board.seeds, self.rules)
         game_copy.set_state(self.get_state())
         return game_copy
     
+    def get_canonical_key(self):
+        """Return a key shared by this position and its player-swapped mirror image.
+        
+        Scores relative to the side to move can be cached under the key as they
+        are, since the mirrored position has the same score for its side to move.
+        
+        Returns:
+            tuple: Board state as seen by the side to move
+        """
+        return self.board.get_canonical_state(self.current_player)
+    
+    def expand(self):
+        """Return all legal children of the current position in one pass.
+        
+        Each move is sown exactly once. Callers can order, evaluate or filter
+        children from the returned data and only build Game objects for the
+        children they actually search (see get_child).
+        
+        Returns:
+            list: Child tuples of (move, board state, player to move, free turn,
+                seeds captured, game over), in move order
+        """
+        if self.game_over:
+            return []
+        
+        # Generated code for this board size and player, if available
+        kernel = get_kernel(self.board.pits, self.current_player)
+        if kernel is not None:
+            return kernel.expand(self.board.state)
+        return self._expand_generic()
+    
+    def _expand_generic(self):
+        """expand() through Move.execute, used when no kernel is available."""
+        if self.game_over:
+            return []
+        
+        children = []
+        scratch = Board(self.board.pits, self.board.seeds)
+        start_idx = 0 if self.current_player == 0 else self.board.pits + 1
+        
+        for pit in range(self.board.pits):
+            if self.board[start_idx + pit] == 0:
+                continue
+            
+            scratch.state = self.board.state.copy()
+            move = Move(self.current_player, pit)
+            free_turn = move.execute(scratch)
+            game_over = False
+            
+            if scratch.is_player_side_empty(0) or scratch.is_player_side_empty(1):
+                scratch.collect_remaining_seeds()
+                game_over = True
+                free_turn = False
+            
+            next_player = self.current_player if free_turn else 1 - self.current_player
+            children.append(Child(pit, scratch.state, next_player, free_turn, move.captured, game_over))
+        
+        return children
+    
+    def get_child(self, child):
+        """Return a new game in the position described by an expand() child."""
+        game = Game(self.board.pits, self.board.seeds, self.rules)
+        game.board.set_state(child.state)
+        game.current_player = child.current_player
+        game.game_over = child.game_over
+        return game
+    
     def get_possible_moves(self):
         """Return list of valid moves for current player."""
         if self.game_over:
@@ -73,6 +156,7 @@ class Game:
         
         # Execute the move
         free_turn = move.execute(self.board)
+        self.last_capture = move.captured
         
         # Check if the game is over
         if self.board.is_player_side_empty(0) or self.board.is_player_side_empty(1):
@@ -101,6 +185,19 @@ class Game:
         else:
             return -1  # Draw
     
+    def get_margin_bounds(self, player):
+        """Return bounds on a player's final store margin.
+
+        Every seed still on the pits can end up in either store, so the final
+        margin lies within the current margin plus or minus the seeds in play.
+
+        Returns:
+            tuple: (lowest, highest) possible final margin for the player
+        """
+        margin = self.board[self.board.get_player_store(player)] - self.board[self.board.get_player_store(1 - player)]
+        in_play = self.board.get_seeds_in_play()
+        return margin - in_play, margin + in_play
+    
     def print_board(self):
         """Print the current state of the board."""
         self.board.print()
@@ -138,3 +235,67 @@ class Game:
             return opposite_idx is not None and self.board[opposite_idx] > 0
             
         return False
+
+
+class VariantGame(Game):
+    """Game under rules other than DEFAULT_RULES.
+    
+    Game(pits, seeds, rules) returns a VariantGame for such rules. Moves are
+    played through a move function built for the rules, see
+    Rules.get_move_function.
+    """
+    
+    def __init__(self, pits=6, seeds=4, rules=None):
+        super().__init__(pits, seeds, rules)
+        self._variant_move = self.rules.get_move_function(pits)
+    
+    def __getstate__(self):
+        # The generated move function cannot be pickled; it is rebuilt on load
+        state = self.__dict__.copy()
+        del state['_variant_move']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._variant_move = self.rules.get_move_function(self.board.pits)
+    
+    def expand(self):
+        """Return all legal children, see Game.expand."""
+        if self.game_over:
+            return []
+        
+        children = []
+        start_idx = 0 if self.current_player == 0 else self.board.pits + 1
+        
+        for pit in range(self.board.pits):
+            if self.board[start_idx + pit] == 0:
+                continue
+            
+            state = self.board.state.copy()
+            free_turn, captured, game_over = self._variant_move(state, self.current_player, pit)
+            next_player = self.current_player if free_turn else 1 - self.current_player
+            children.append(Child(pit, state, next_player, free_turn, captured, game_over))
+        
+        return children
+    
+    def make_move(self, pit_idx):
+        """Make a move in the game, see Game.make_move."""
+        if self.game_over:
+            return False
+        
+        start_idx = 0 if self.current_player == 0 else self.board.pits + 1
+        if not 0 <= pit_idx < self.board.pits or self.board[start_idx + pit_idx] == 0:
+            return False
+        
+        free_turn, self.last_capture, self.game_over = self._variant_move(self.board.state, self.current_player, pit_idx)
+        if not free_turn:
+            self.current_player = 1 - self.current_player
+        return True
+    
+    def can_capture(self, pit):
+        """Check if a move from the given pit will result in a capture."""
+        # Variants decide captures by their own rules, so play the move on a copy
+        actual_idx = pit if self.current_player == 0 else pit + self.board.pits + 1
+        if not 0 <= pit < self.board.pits or self.board[actual_idx] == 0:
+            return False
+        return self._variant_move(self.board.state.copy(), self.current_player, pit)[1] > 0
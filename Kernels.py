@@ -0,0 +1,204 @@
+import os
+
+# Kernels are generated for boards up to this many pits per player; larger
+# boards use the generic code. The source grows with the square of the pits
+# (about 4500 lines and 0.3 sec to build per player at 12 pits).
+MAX_KERNEL_PITS = 12
+
+# Set to False (or set KALAHA_NO_KERNELS in the environment) to use the
+# generic code everywhere, e.g. to measure the gain of the kernels
+enabled = not os.environ.get("KALAHA_NO_KERNELS")
+
+# Kernels by (pits, player); None marks a configuration without kernels
+_KERNELS = {}
+
+
+class Kernel:
+    """Move and evaluation functions generated for one board size and player to move.
+
+    All board indices are constants in the generated code, so the functions
+    work directly on the board state list without Board methods or index
+    arithmetic. They follow the default rules exactly, see get_kernel.
+
+    Attributes:
+        move (callable): move(state, pit) plays a legal move on a state list in
+            place and returns (free turn, seeds captured, game over)
+        expand (callable): expand(state) returns the Game.expand children of a
+            position that is not over
+        features (callable): features(state) returns the KalahaAI._features
+            tuple of a position that is not over
+        source (str): Generated Python source
+    """
+
+    def __init__(self, pits, player, source, namespace):
+        self.pits = pits
+        self.player = player
+        self.source = source
+        self.move = namespace['move']
+        self.expand = namespace['expand']
+        self.features = namespace['features']
+
+
+def get_kernel(pits, player):
+    """Return the kernel of a board size and player, generating it on first use.
+
+    Args:
+        pits (int): Number of pits per player
+        player (int): Player to move
+
+    Returns:
+        Kernel: The kernel, or None if kernels are disabled or not available for
+            this board size, in which case callers use the generic code
+    """
+    if not enabled:
+        return None
+    key = (pits, player)
+    if key not in _KERNELS:
+        _KERNELS[key] = _build_kernel(pits, player) if 0 < pits <= MAX_KERNEL_PITS else None
+    return _KERNELS[key]
+
+
+def _build_kernel(pits, player):
+    """Generate and compile the kernel of a board size and player."""
+    from Game import Child
+
+    source = generate_source(pits, player)
+    namespace = {'Child': Child}
+    exec(compile(source, f"<kernel {pits} pits, player {player}>", "exec"), namespace)
+    return Kernel(pits, player, source, namespace)
+
+
+def _sum(indices, name="s"):
+    return " + ".join(f"{name}[{i}]" for i in indices)
+
+
+def generate_source(pits, player):
+    """Return the Python source of the kernel functions for a board size and player.
+
+    Sowing a pit visits the other board positions in a fixed order, so every
+    pit gets its own function: full laps add the same count to every position,
+    and the remaining seeds are placed one by one until the last seed, whose
+    position is known at that point and handled with constant indices.
+    """
+    size = 2 * pits + 2
+    store = pits if player == 0 else 2 * pits + 1
+    opponent_store = 2 * pits + 1 if player == 0 else pits
+    own = list(range(pits)) if player == 0 else list(range(pits + 1, 2 * pits + 1))
+    opponent = list(range(pits + 1, 2 * pits + 1)) if player == 0 else list(range(pits))
+    lap = size - 1
+    pit_indices = own + opponent
+
+    lines = []
+    emit = lines.append
+
+    def order(index):
+        """Positions sown from an index, ending with the index itself."""
+        positions = []
+        current = index
+        while len(positions) < lap:
+            current = (current + 1) % size
+            if current != opponent_store:
+                positions.append(current)
+        return positions
+
+    def emit_finish(indent, captured):
+        """Emit the game end check and the return of a move."""
+        pad = " " * indent
+        emit(f"{pad}if not ({' or '.join(f's[{i}]' for i in own)}) or "
+             f"not ({' or '.join(f's[{i}]' for i in opponent)}):")
+        emit(f"{pad}    s[{store}] += {_sum(own)}")
+        emit(f"{pad}    s[{opponent_store}] += {_sum(opponent)}")
+        emit(f"{pad}    {' = '.join(f's[{i}]' for i in pit_indices)} = 0")
+        emit(f"{pad}    return False, {captured}, True")
+
+    def emit_last(indent, last):
+        """Emit the end of a move whose last seed landed on a known position."""
+        pad = " " * indent
+        if last == store:
+            emit_finish(indent, 0)
+            emit(f"{pad}return True, 0, False")
+        elif last in own:
+            opposite = 2 * pits - last
+            emit(f"{pad}if s[{last}] == 1 and s[{opposite}]:")
+            emit(f"{pad}    captured = s[{opposite}] + 1")
+            emit(f"{pad}    s[{store}] += captured")
+            emit(f"{pad}    s[{opposite}] = s[{last}] = 0")
+            emit_finish(indent + 4, "captured")
+            emit(f"{pad}    return False, captured, False")
+            emit_finish(indent, 0)
+            emit(f"{pad}return False, 0, False")
+        else:
+            emit_finish(indent, 0)
+            emit(f"{pad}return False, 0, False")
+
+    # One sowing function per pit
+    for pit, index in enumerate(own):
+        positions = order(index)
+        emit(f"def _move_{pit}(s):")
+        emit(f"    n = s[{index}]")
+        emit(f"    s[{index}] = 0")
+        emit(f"    if n >= {lap}:")
+        emit(f"        laps, n = divmod(n, {lap})")
+        for position in positions:
+            emit(f"        s[{position}] += laps")
+        emit(f"        if n == 0:")
+        emit_last(12, index)
+        for count, position in enumerate(positions[:-1], start=1):
+            emit(f"    s[{position}] += 1")
+            emit(f"    if n == {count}:")
+            emit_last(8, position)
+        emit("")
+
+    emit(f"_MOVES = ({', '.join(f'_move_{pit}' for pit in range(pits))},)")
+    emit("")
+    emit("def move(s, pit):")
+    emit("    return _MOVES[pit](s)")
+    emit("")
+
+    # Children in move order, as Game.expand returns them
+    emit("def expand(s):")
+    emit("    children = []")
+    for pit, index in enumerate(own):
+        emit(f"    if s[{index}]:")
+        emit(f"        c = s.copy()")
+        emit(f"        free_turn, captured, game_over = _move_{pit}(c)")
+        emit(f"        children.append(Child({pit}, c, {player} if free_turn else {1 - player}, "
+             f"free_turn, captured, game_over))")
+    emit("    return children")
+    emit("")
+
+    # Evaluation features. A capturing move is counted as Game.can_capture does:
+    # from the pit contents before sowing, landing after n % lap steps.
+    emit("def features(s):")
+    emit("    extra_turns = " + " + ".join(f"(s[{index}] == {store - index})" for index in own))
+    emit("    captures = 0")
+    for index in own:
+        positions = order(index)
+        cases = [(count, position) for count, position in enumerate(positions[:-1], start=1) if position in own]
+        if not cases:
+            continue
+        emit(f"    n = s[{index}] % {lap}")
+        for case, (count, position) in enumerate(cases):
+            keyword = "if" if case == 0 else "elif"
+            emit(f"    {keyword} n == {count}:")
+            emit(f"        captures += s[{position}] == 0 and s[{2 * pits - position}] > 0")
+    emit(f"    return (s[{store}] - s[{opponent_store}], {_sum(own)} - ({_sum(opponent)}), "
+         f"extra_turns, captures)")
+    emit("")
+
+    return "\n".join(lines)
+
+
+def main():
+    """Print the generated kernel source of a board size and player."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print the generated move and evaluation kernels")
+    parser.add_argument("--pits", type=int, default=6, help="Pits per player")
+    parser.add_argument("--player", type=int, choices=(0, 1), default=0, help="Player to move")
+    args = parser.parse_args()
+    print(generate_source(args.pits, args.player))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import time
+import random
+import argparse
+import multiprocessing
+from Game import Game
+from AI import KalahaAI, SearchAborted, DEFAULT_WEIGHTS, make_engine, margin_value
+from Transposition import SharedTranspositionTable
+
+# Engine of the current helper process, set up by _init_helper
+_helper = {}
+
+
+def _init_helper(spec, table_name, table_size, stop_event):
+    """Create the helper engine and attach it to the shared transposition table."""
+    engine = make_engine(spec)
+    engine.transposition_table = SharedTranspositionTable(table_size, name=table_name)
+    engine.stop_event = stop_event
+    _helper['engine'] = engine
+
+
+def _helper_search(state, pits, seeds, helper_id, start_depth, max_depth):
+    """Search the root with iterative deepening until the main search stops the helpers.
+
+    Helpers start at different depths, alternating between helpers, and break
+    move ordering ties differently, so they fill the shared table with
+    different parts of the tree and can complete deeper searches.
+
+    Returns:
+        tuple: (depth, move, value) of the deepest completed search, or None
+    """
+    engine = _helper['engine']
+    engine.order_rng = random.Random(helper_id)
+
+    game = Game(pits, seeds)
+    game.set_state(state)
+    children = game.expand()
+
+    result = None
+    depth = start_depth
+    try:
+        while depth <= max_depth:
+            move, value = engine._search_root(game, children, depth)
+            result = (depth, move, value)
+            depth += 1
+    except SearchAborted:
+        pass
+    return result
+
+
+class LazySMPAI(KalahaAI):
+    """KalahaAI searching with several processes that share one transposition table.
+
+    The main process searches the root with iterative deepening up to max_depth
+    while helper processes search the same root at other depths and orderings.
+    All of them read and write one lock-free table in shared memory. When the
+    main search finishes the helpers are stopped, and the move of the deepest
+    completed search is played.
+
+    With a time budget, the main search and the helpers deepen from the first
+    iterations up to max_depth until the budget runs out. Helpers then add
+    depth in the same wall time: whichever process completed the deepest
+    iteration provides the move.
+    """
+
+    # Helper timing decides which search finishes first
+    deterministic = False
+
+    def __init__(self, max_depth=7, workers=4, table_size=1 << 20, tablebase=None, weights=DEFAULT_WEIGHTS,
+                 time_budget=None):
+        """Initialize the AI.
+
+        Args:
+            max_depth (int): Depth of the main search
+            workers (int): Total number of searching processes, including the main one
+            table_size (int): Number of slots in the shared transposition table
+            tablebase (Tablebase): Optional exact position values used for perfect play
+            weights (tuple): Evaluation weights, see DEFAULT_WEIGHTS
+            time_budget (float): Optional seconds per move; all processes then
+                deepen up to max_depth until the budget runs out
+        """
+        # The shared table is allocated by the first search, so engines that
+        # never search hold no shared memory, see close
+        super().__init__(max_depth, tablebase=tablebase, weights=weights, time_budget=time_budget)
+        self.workers = workers
+        self.table_size = table_size
+        self._pool = None
+        self._helper_stop = None
+
+    def get_spec(self):
+        """Return a serializable description of the engine configuration."""
+        spec = super().get_spec()
+        spec.pop('transposition_table', None)
+        spec['workers'] = self.workers
+        spec['table_size'] = self.table_size
+        return spec
+
+    def _start_helpers(self):
+        """Start the helper process pool."""
+        helper_spec = KalahaAI.get_spec(self)
+        helper_spec['engine'] = 'KalahaAI'
+        helper_spec.pop('transposition_table', None)
+        helper_spec.pop('time_budget', None)  # Helpers are stopped by the main process
+
+        self._helper_stop = multiprocessing.Event()
+        self._pool = multiprocessing.Pool(
+            self.workers - 1,
+            initializer=_init_helper,
+            initargs=(helper_spec, self.transposition_table.name, self.table_size, self._helper_stop)
+        )
+
+    def _helper_depths(self, helper_id):
+        """Return the (first, last) depth a helper searches.
+
+        Without a budget, helpers work around the final depth of the main
+        search; with one, they deepen from the start like the main search.
+        """
+        if self.time_budget is None:
+            return max(1, self.max_depth - 1 + helper_id % 2), self.max_depth + 8
+        return 1 + helper_id % 2, self.max_depth
+
+    def search(self, game):
+        """Return the best move found by the main search and its helpers.
+
+        Args:
+            game (Game): The current game state
+
+        Returns:
+            tuple: (best move, its value for the side to move, completed search depth)
+        """
+        children = game.expand()
+
+        if not children:
+            return None, None, 0
+
+        if self.tablebase is not None:
+            solution = self.tablebase.solve(game)
+            if solution is not None:
+                return solution['best_move'], margin_value(solution['value']), 0
+
+        if self.transposition_table is None:
+            self.transposition_table = SharedTranspositionTable(self.table_size)
+
+        pending = []
+        if self.workers > 1:
+            if self._pool is None:
+                self._start_helpers()
+            self._helper_stop.clear()
+            state = game.get_state()
+            pending = [
+                self._pool.apply_async(_helper_search, (state, game.board.pits, game.board.seeds, helper_id,
+                                                        *self._helper_depths(helper_id)))
+                for helper_id in range(1, self.workers)
+            ]
+
+        # Main search with iterative deepening, which also fills the shared table
+        best_move, best_value, best_depth = self._order_moves(children)[0].move, None, 0
+        if self.time_budget is not None:
+            self._deadline = time.perf_counter() + self.time_budget
+        try:
+            for depth in range(1, self.max_depth + 1):
+                best_move, best_value = self._search_root(game, children, depth)
+                best_depth = depth
+        except SearchAborted:
+            pass
+        finally:
+            self._deadline = None
+
+        if pending:
+            self._helper_stop.set()
+            for result in pending:
+                helper_result = result.get()
+                if helper_result is not None and helper_result[0] > best_depth:
+                    best_depth, best_move, best_value = helper_result
+
+        return best_move, best_value, best_depth
+
+    def close(self):
+        """Stop the helper processes and free the shared table.
+
+        The engine stays usable; a later search allocates a new table.
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        if self.transposition_table is not None:
+            self.transposition_table.close()
+            self.transposition_table = None
+
+
+def measure_speedup(workers=4, budget=0.5, max_depth=30, num_positions=10, pits=6, seeds=4, rng_seed=0):
+    """Compare the depth LazySMPAI and a single-process KalahaAI reach in the same time.
+
+    Both engines search the same positions from random games with the same
+    time budget per position.
+
+    Returns:
+        dict: Average completed depth and nodes per second of each engine
+    """
+    from Benchmark import _sample_positions
+
+    rng = random.Random(rng_seed)
+    positions = [game for game in _sample_positions(num_positions * 4, pits, seeds, rng_seed)
+                 if not game.game_over]
+    positions = rng.sample(positions, min(num_positions, len(positions)))
+
+    results = {}
+    engines = [("KalahaAI", KalahaAI(max_depth=max_depth, time_budget=budget)),
+               ("LazySMPAI", LazySMPAI(max_depth=max_depth, workers=workers, time_budget=budget))]
+    for name, engine in engines:
+        depths = []
+        start_time = time.perf_counter()
+        for game in positions:
+            depths.append(engine.search(game)[2])
+        elapsed = time.perf_counter() - start_time
+        results[name] = {
+            'avg_depth': sum(depths) / len(depths),
+            'nodes_per_sec': engine.nodes / elapsed if elapsed > 0 else 0  # Main process only for LazySMPAI
+        }
+        if isinstance(engine, LazySMPAI):
+            engine.close()
+
+    results['depth_gain'] = results['LazySMPAI']['avg_depth'] - results['KalahaAI']['avg_depth']
+    return results
+
+
+def main():
+    """Measure the depth gained by Lazy SMP within a fixed time per move."""
+    parser = argparse.ArgumentParser(description="Lazy SMP speedup over the single-process search")
+    parser.add_argument("--workers", type=int, default=4, help="Searching processes, including the main one")
+    parser.add_argument("--budget", type=float, default=0.5, help="Seconds per position")
+    parser.add_argument("--positions", type=int, default=10, help="Positions from random games")
+    args = parser.parse_args()
+
+    results = measure_speedup(args.workers, args.budget, num_positions=args.positions)
+    for name in ("KalahaAI", "LazySMPAI"):
+        print(f"{name:<10} average depth {results[name]['avg_depth']:.2f}, "
+              f"{results[name]['nodes_per_sec']:.0f} nodes/s in the main process")
+    print(f"Depth gained with {args.workers} processes: {results['depth_gain']:+.2f} "
+          f"({multiprocessing.cpu_count()} CPUs available)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,17 @@
+import sys
+import json
+import time
+import argparse
+import multiprocessing
 from Game import Game
 from UI import UI
-from AI import KalahaAI, RandomKalahaAI
+from AI import KalahaAI, RandomKalahaAI, make_engine
+from Benchmark import generate_openings, play_game
+from Profiler import SamplingProfiler, add_profile_arguments, profiler_from_args, finish_profile
+from PositionCache import PositionCache
 
-def main():
-    """Main function to run the Kalaha game."""
+def play_interactive():
+    """Run an interactive Kalaha game."""
     # Game settings
     pits = 6
     seeds = 4
@@ -62,5 +70,257 @@ def main():
     
     print("Thank you for playing!")
 
+def parse_budget(text):
+    """Parse a time budget such as '100ms', '0.5s' or '2' (seconds) into seconds."""
+    text = text.strip().lower()
+    if text.endswith("ms"):
+        return float(text[:-2]) / 1000
+    if text.endswith("s"):
+        return float(text[:-1])
+    return float(text)
+
+
+def _parse_value(text):
+    """Parse an engine option value: a number, a '/'-separated list of numbers or text."""
+    if "/" in text:
+        return [_parse_value(part) for part in text.split("/")]
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parse_engine(text):
+    """Parse an engine spec from the command line.
+
+    Accepts a JSON spec as returned by get_spec, or 'Name:key=value,...', for
+    example 'KalahaAI:max_depth=6,weights=8/2/5/14'.
+
+    Returns:
+        dict: Engine spec for make_engine
+    """
+    if text.lstrip().startswith("{"):
+        return json.loads(text)
+
+    name, _, options = text.partition(":")
+    spec = {'engine': name or 'KalahaAI'}
+    for option in filter(None, options.split(",")):
+        key, _, value = option.partition("=")
+        spec[key.strip()] = _parse_value(value.strip())
+    return spec
+
+
+# Engines and settings of the current worker process, set up by _init_worker
+_worker = {}
+
+
+def _init_worker(specs, pits, seeds, profile_interval=None, cache_path=None):
+    """Create the engines of a worker process, its position cache and its profiler if profiling is on."""
+    _worker['engines'] = [make_engine(spec) for spec in specs]
+    
+    # Every worker opens its own connection to the shared cache file
+    _worker['cache'] = PositionCache(cache_path) if cache_path is not None else None
+    for engine in _worker['engines']:
+        engine.position_cache = _worker['cache']
+    _worker['board'] = (pits, seeds)
+    if profile_interval is not None:
+        _worker['profiler'] = SamplingProfiler(profile_interval)
+        _worker['profiler'].start()
+
+
+def _run_game(task):
+    """Play one game in a worker and return its machine-readable result.
+
+    Args:
+        task (tuple): (game number, opening, index of the engine playing as player 1)
+    """
+    game_number, opening, first_engine = task
+    engines = _worker['engines']
+    pits, seeds = _worker['board']
+    first_ai = engines[first_engine]
+    second_ai = engines[1 - first_engine] if len(engines) > 1 else engines[0]
+
+    start_time = time.perf_counter()
+    record = play_game(first_ai, second_ai, opening, pits, seeds)
+    result = {
+        'game': game_number,
+        'opening': list(opening),
+        'first_engine': first_engine,
+        'engines': [first_ai.get_spec(), second_ai.get_spec()],
+        'winner': record['winner'],
+        'scores': record['scores'],
+        'moves': record['moves'],
+        'captures': record['captures'],
+        'extra_turns': record['extra_turns'],
+        'move_times': record['move_times'],
+        'duration': time.perf_counter() - start_time
+    }
+    
+    # Results of a finished game are written out, so other workers can use them
+    if _worker['cache'] is not None:
+        _worker['cache'].flush()
+    
+    # Samples of a profiling worker travel back with the result
+    if 'profiler' in _worker:
+        result['profile'] = _worker['profiler'].take_stacks()
+    return result
+
+
+def run_headless(specs, num_games, workers=1, pits=6, seeds=4, opening_plies=4, rng_seed=0, output=None,
+                 profiler=None, cache_path=None):
+    """Play a batch of games without any board output and stream one JSON line per game.
+
+    With one engine spec every game is self-play. With two, each opening is
+    played twice with colors swapped. If fewer distinct openings exist than
+    needed, for example with no opening plies, openings are repeated.
+
+    Args:
+        specs (list): One or two engine specs
+        num_games (int): Number of games
+        workers (int): Number of worker processes
+        pits (int): Number of pits per player
+        seeds (int): Initial number of seeds per pit
+        opening_plies (int): Random moves per opening
+        rng_seed (int): Seed of the opening generator
+        output: File object receiving the results (stdout by default)
+        profiler (SamplingProfiler): Optional profiler collecting samples of
+            this process or, with several workers, of every worker
+        cache_path (str): Optional position cache file shared by all workers and runs
+
+    Returns:
+        dict: Wins per seat, wins per engine (with two engines), draws, games and throughput
+    """
+    output = output or sys.stdout
+
+    num_openings = num_games if len(specs) == 1 else (num_games + 1) // 2
+    openings = generate_openings(num_openings, opening_plies, pits, seeds, rng_seed)
+    if not openings:
+        raise ValueError(f"No opening with {opening_plies} plies leaves a game in progress")
+    if len(openings) < num_openings:
+        print(f"Only {len(openings)} distinct openings with {opening_plies} plies, "
+              f"repeating them to play {num_games} games", file=sys.stderr)
+        openings = [openings[i % len(openings)] for i in range(num_openings)]
+
+    if len(specs) == 1:
+        tasks = [(i + 1, opening, 0) for i, opening in enumerate(openings)]
+    else:
+        schedule = [(opening, seat) for opening in openings for seat in (0, 1)][:num_games]
+        tasks = [(i + 1, opening, seat) for i, (opening, seat) in enumerate(schedule)]
+
+    summary = {'games': 0, 'wins': [0, 0], 'draws': 0}
+    if len(specs) == 2:
+        summary['engine_wins'] = [0, 0]
+    start_time = time.perf_counter()
+
+    def write(result):
+        stacks = result.pop('profile', None)
+        if stacks is not None:
+            profiler.merge(stacks)
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+        summary['games'] += 1
+        if result['winner'] in (0, 1):
+            summary['wins'][result['winner']] += 1
+            if 'engine_wins' in summary:
+                # Engine first_engine played as player 1 in this game
+                summary['engine_wins'][result['first_engine'] ^ result['winner']] += 1
+        else:
+            summary['draws'] += 1
+
+    if workers <= 1:
+        _init_worker(specs, pits, seeds, cache_path=cache_path)
+        if profiler is not None:
+            profiler.start()
+        try:
+            for task in tasks:
+                write(_run_game(task))
+        finally:
+            if profiler is not None:
+                profiler.stop()
+            # Engines with helper processes or shared memory release them
+            for engine in _worker['engines']:
+                if hasattr(engine, 'close'):
+                    engine.close()
+    else:
+        profile_interval = profiler.interval if profiler is not None else None
+        with multiprocessing.Pool(workers, initializer=_init_worker,
+                                  initargs=(specs, pits, seeds, profile_interval, cache_path)) as pool:
+            for result in pool.imap_unordered(_run_game, tasks):
+                write(result)
+
+    elapsed = time.perf_counter() - start_time
+    summary['seconds'] = elapsed
+    summary['games_per_second'] = summary['games'] / elapsed if elapsed > 0 else 0
+    return summary
+
+
+def main():
+    """Main function to run the Kalaha game.
+
+    Without arguments an interactive game is started. The 'selfplay' and
+    'match' commands run batches of games headless.
+    """
+    parser = argparse.ArgumentParser(description="Kalaha game and headless engine runner")
+    commands = parser.add_subparsers(dest="command")
+
+    selfplay = commands.add_parser("selfplay", help="Play an engine against itself")
+    selfplay.add_argument("--engine", type=parse_engine, default=parse_engine("KalahaAI:max_depth=6"),
+                          help="Engine spec, e.g. 'KalahaAI:max_depth=6' or a JSON spec")
+
+    match = commands.add_parser("match", help="Play two engines against each other")
+    match.add_argument("--engine1", type=parse_engine, required=True, help="Engine spec of the first engine")
+    match.add_argument("--engine2", type=parse_engine, required=True, help="Engine spec of the second engine")
+
+    for command in (selfplay, match):
+        command.add_argument("--games", type=int, default=10, help="Number of games")
+        command.add_argument("--workers", type=int, default=1, help="Worker processes")
+        command.add_argument("--budget", type=parse_budget, default=None,
+                             help="Time budget per move, e.g. 100ms (overrides the engine specs)")
+        command.add_argument("--pits", type=int, default=6, help="Pits per player")
+        command.add_argument("--seeds", type=int, default=4, help="Seeds per pit")
+        command.add_argument("--opening-plies", type=int, default=4, help="Random moves per opening")
+        command.add_argument("--seed", type=int, default=0, help="Random seed for the openings")
+        command.add_argument("--output", default=None, help="Write per-game JSON lines here instead of stdout")
+        command.add_argument("--cache", default=None, help="Position cache file reused across runs")
+        add_profile_arguments(command)
+
+    args = parser.parse_args()
+
+    if args.command is None:
+        play_interactive()
+        return
+
+    specs = [args.engine] if args.command == "selfplay" else [args.engine1, args.engine2]
+    if args.budget is not None:
+        for spec in specs:
+            spec['time_budget'] = args.budget
+    if args.workers > 1 and any(spec.get('workers', 1) > 1 for spec in specs):
+        # Pool workers are daemonic and cannot start the helpers of a parallel engine
+        parser.error("engines with their own worker processes need --workers 1")
+
+    profiler = profiler_from_args(args)
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        summary = run_headless(specs, args.games, args.workers, args.pits, args.seeds,
+                               args.opening_plies, args.seed, output, profiler, args.cache)
+    finally:
+        if args.output:
+            output.close()
+
+    # The summary goes to stderr so stdout stays machine-readable
+    if 'engine_wins' in summary:
+        results = (f"engine 1 wins {summary['engine_wins'][0]}, engine 2 wins {summary['engine_wins'][1]}, "
+                   f"draws {summary['draws']} (player 1 won {summary['wins'][0]})")
+    else:
+        results = (f"Player 1 wins {summary['wins'][0]}, Player 2 wins {summary['wins'][1]}, "
+                   f"draws {summary['draws']}")
+    print(f"{summary['games']} games in {summary['seconds']:.2f} sec "
+          f"({summary['games_per_second']:.2f} games/s): {results}", file=sys.stderr)
+    if profiler is not None:
+        finish_profile(profiler, args.profile, sys.stderr)
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
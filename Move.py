@@ -8,6 +8,7 @@ class Move:
         """
         self.player = player
         self.pit_index = pit_index
+        self.captured = 0  # Seeds moved to the store by a capture
         
     def get_actual_index(self, board):
         """Get the actual index on the board based on player and pit index."""
@@ -65,7 +66,8 @@ class Move:
             if opposite_idx is not None and board[opposite_idx] > 0:
                 # Capture opponent's seeds
                 player_store = board.get_player_store(self.player)
-                board[player_store] += board[opposite_idx] + board[current_idx]
+                self.captured = board[opposite_idx] + board[current_idx]
+                board[player_store] += self.captured
                 board[opposite_idx] = 0
                 board[current_idx] = 0
         
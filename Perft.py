@@ -0,0 +1,219 @@
+import time
+import argparse
+import multiprocessing
+from Game import Game
+from Rules import Rules
+
+# Counters reported per ply, over all moves played at that ply
+FIELDS = ("leaves", "free_turns", "captures", "terminals")
+
+# Counts from the 6x4 start position per ply, as (leaves, free turns, captures,
+# terminals). Every move is one ply, free turns included.
+REFERENCE_COUNTS = {
+    1: (6, 1, 0, 0),
+    2: (35, 6, 0, 0),
+    3: (185, 27, 7, 0),
+    4: (942, 156, 28, 0),
+    5: (4690, 695, 108, 0),
+    6: (23233, 3488, 580, 0),
+    7: (114430, 15503, 3731, 0),
+    8: (563055, 69198, 22708, 0),
+    9: (2763490, 320536, 132985, 1),
+}
+
+
+def _make_move_children(game):
+    """Reference backend: clone the game and play each move with Game.make_move.
+
+    Yields:
+        tuple: (free turn, seeds captured, child game)
+    """
+    player = game.current_player
+    for move in game.get_possible_moves():
+        child = game.clone()
+        child.make_move(move)
+        yield not child.game_over and child.current_player == player, child.last_capture, child
+
+
+def _expand_children(game):
+    """Backend sowing every move once with Game.expand, as the search does."""
+    for child in game.expand():
+        yield child.free_turn, child.capture, game.get_child(child)
+
+
+def _generic_children(game):
+    """Backend using Game.expand without the generated kernels, see Kernels.py."""
+    # Rule variants never use kernels
+    expand = game._expand_generic if game.rules.is_default() else game.expand
+    for child in expand():
+        yield child.free_turn, child.capture, game.get_child(child)
+
+
+# Move generation backends by name; each yields (free turn, seeds captured,
+# child game) for every legal move, in move order
+BACKENDS = {
+    'make_move': _make_move_children,
+    'expand': _expand_children,
+    'generic': _generic_children,
+}
+
+
+def _count(game, depth, children, totals, ply=0):
+    """Add the moves of every ply below a position to totals."""
+    row = totals[ply]
+    for free_turn, captured, child in children(game):
+        row[0] += 1
+        row[1] += free_turn
+        row[2] += captured > 0
+        row[3] += child.game_over
+        if ply + 1 < depth and not child.game_over:
+            _count(child, depth, children, totals, ply + 1)
+
+
+def _as_dicts(totals):
+    return [dict(zip(FIELDS, row)) for row in totals]
+
+
+def perft(game, depth, backend='expand'):
+    """Count the positions reached from a game at every ply up to a depth.
+
+    Games that end early are counted as terminals at the ply they end on and
+    are not extended further.
+
+    Args:
+        game (Game): Start position
+        depth (int): Number of plies
+        backend (str): Name of the move generation backend, see BACKENDS
+
+    Returns:
+        list: One dict of FIELDS counts per ply, starting with ply 1
+    """
+    totals = [[0] * len(FIELDS) for _ in range(depth)]
+    if depth > 0:
+        _count(game, depth, BACKENDS[backend], totals)
+    return _as_dicts(totals)
+
+
+def _root_moves(game, backend):
+    """Return (move, counts of the move itself, child game) for every root move."""
+    moves = game.get_possible_moves()
+    return [(move, [1, int(free_turn), int(captured > 0), int(child.game_over)], child)
+            for move, (free_turn, captured, child) in zip(moves, BACKENDS[backend](game))]
+
+
+def divide(game, depth, backend='expand'):
+    """Break the counts of the final ply down by root move.
+
+    Returns:
+        dict: FIELDS counts at ply depth below each root move
+    """
+    counts = {}
+    for move, own_counts, child in _root_moves(game, backend):
+        if depth == 1:
+            counts[move] = dict(zip(FIELDS, own_counts))
+        elif child.game_over:
+            counts[move] = dict.fromkeys(FIELDS, 0)
+        else:
+            counts[move] = perft(child, depth - 1, backend)[-1]
+    return counts
+
+
+def _perft_task(task):
+    """Run perft on a position sent to a worker process."""
+    state, pits, seeds, rules, depth, backend = task
+    game = Game(pits, seeds, Rules(**rules))
+    game.set_state(state)
+    return perft(game, depth, backend)
+
+
+def parallel_perft(game, depth, backend='expand', workers=None):
+    """Run perft with the subtree of each root move in its own worker process.
+
+    Returns:
+        list: The same counts as perft
+    """
+    root_moves = _root_moves(game, backend)
+    totals = [[0] * len(FIELDS) for _ in range(depth)]
+    for _, own_counts, _ in root_moves:
+        totals[0] = [total + count for total, count in zip(totals[0], own_counts)]
+
+    tasks = [(child.get_state(), game.board.pits, game.board.seeds, game.rules.to_dict(), depth - 1, backend)
+             for _, _, child in root_moves if not child.game_over and depth > 1]
+    with multiprocessing.Pool(workers or min(len(tasks), multiprocessing.cpu_count()) or 1) as pool:
+        for subtree in pool.imap_unordered(_perft_task, tasks):
+            for ply, counts in enumerate(subtree, start=1):
+                totals[ply] = [total + counts[field] for total, field in zip(totals[ply], FIELDS)]
+    return _as_dicts(totals)
+
+
+def verify(depth, backends=None):
+    """Check backends against the reference counts of the 6x4 start position.
+
+    Returns:
+        bool: True if every backend matches at every ply up to depth
+    """
+    ok = True
+    for backend in backends or BACKENDS:
+        counts = perft(Game(6, 4), depth, backend)
+        for ply, row in enumerate(counts, start=1):
+            expected = REFERENCE_COUNTS.get(ply)
+            if expected is None:
+                continue
+            actual = tuple(row[field] for field in FIELDS)
+            if actual != expected:
+                print(f"{backend}: ply {ply} gives {actual}, expected {expected}")
+                ok = False
+    return ok
+
+
+def main():
+    """Count positions from a start position or a move sequence."""
+    parser = argparse.ArgumentParser(description="Kalaha perft: count reachable positions per ply")
+    parser.add_argument("depth", type=int, help="Number of plies")
+    parser.add_argument("--pits", type=int, default=6, help="Pits per player")
+    parser.add_argument("--seeds", type=int, default=4, help="Seeds per pit")
+    parser.add_argument("--moves", default="", help="Comma-separated moves leading to the position")
+    parser.add_argument("--rules", type=Rules.parse, default=Rules(),
+                        help="Comma-separated rule variants: capture_empty, sweep_to_emptier, no_first_lap_capture")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="expand", help="Move generation backend")
+    parser.add_argument("--divide", action="store_true", help="Break the last ply down by root move")
+    parser.add_argument("--parallel", action="store_true", help="Search root moves in worker processes")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --parallel")
+    parser.add_argument("--verify", action="store_true",
+                        help="Check every backend against the 6x4 reference counts up to depth")
+    args = parser.parse_args()
+
+    if args.verify:
+        ok = verify(args.depth)
+        print("All backends match the reference counts" if ok else "Mismatch found")
+        raise SystemExit(0 if ok else 1)
+
+    game = Game(args.pits, args.seeds, args.rules)
+    for move in filter(None, args.moves.split(",")):
+        game.make_move(int(move))
+
+    start_time = time.perf_counter()
+    if args.divide:
+        counts = divide(game, args.depth, args.backend)
+        elapsed = time.perf_counter() - start_time
+        print(f"{'Move':>4} " + " ".join(f"{field:>12}" for field in FIELDS))
+        for move, row in counts.items():
+            print(f"{move:>4} " + " ".join(f"{row[field]:>12}" for field in FIELDS))
+        leaves = sum(row["leaves"] for row in counts.values())
+    else:
+        if args.parallel:
+            counts = parallel_perft(game, args.depth, args.backend, args.workers)
+        else:
+            counts = perft(game, args.depth, args.backend)
+        elapsed = time.perf_counter() - start_time
+        print(f"{'Ply':>4} " + " ".join(f"{field:>12}" for field in FIELDS))
+        for ply, row in enumerate(counts, start=1):
+            print(f"{ply:>4} " + " ".join(f"{row[field]:>12}" for field in FIELDS))
+        leaves = sum(row["leaves"] for row in counts)
+
+    rate = leaves / elapsed if elapsed > 0 else 0
+    print(f"{leaves} positions in {elapsed:.2f} sec ({rate:.0f} positions/s, backend {args.backend})")
+
+
+if __name__ == "__main__":
+    main()
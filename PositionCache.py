@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    fingerprint TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    position TEXT NOT NULL,
+    move INTEGER,
+    value REAL,
+    searched_depth INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (fingerprint, depth, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS positions_last_used ON positions (last_used);
+"""
+
+# SQLite limits the number of parameters of one statement, so bulk lookups
+# are split into chunks of this many keys
+_LOOKUP_CHUNK = 300
+
+# Flushes between exact counts of the entries. In between, each process
+# estimates the size from its own writes, which misses the writes of others.
+_COUNT_INTERVAL = 64
+
+
+def engine_fingerprint(spec):
+    """Return a short hash identifying the results of an engine configuration.
+
+    Args:
+        spec (dict): Engine spec from get_spec; engines with equal specs and
+            weights share cache entries
+
+    Returns:
+        str: Hex digest of the spec
+    """
+    text = json.dumps(spec, sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def position_key(game):
+    """Return the text key of a position, shared with its player-swapped mirror.
+
+    The key includes the rule variant if the game does not use the default rules.
+    """
+    key = game.get_canonical_key()
+    text = ",".join(map(str, key))
+    if not game.rules.is_default():
+        text += "|" + ",".join(str(int(flag)) for flag in game.rules.key)
+    return text
+
+
+class PositionCache:
+    """Search results stored in an SQLite file and shared across runs and processes.
+
+    Entries are keyed by (engine fingerprint, depth, canonical position) and
+    hold the best move, its value relative to the side to move and the depth
+    the search completed. The database runs in WAL mode, so any number of
+    processes can read while one writes. Writes and last-use updates are
+    buffered and written in one transaction per batch, and the least recently
+    used entries are evicted once the file holds more than max_entries.
+
+    Every process opens its own connection on first use, so a cache created
+    before forking worker processes can be used by all of them.
+    """
+
+    def __init__(self, path, max_entries=1000000, batch_size=256, timeout=30.0):
+        """Initialize the cache and create the database if needed.
+
+        Args:
+            path (str): SQLite database file
+            max_entries (int): Entries kept before the least recently used are evicted
+            batch_size (int): Buffered writes that trigger a flush
+            timeout (float): Seconds to wait for another process holding the write lock
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._pending = {}  # Key -> (move, value, searched depth), not yet written
+        self._touched = set()  # Keys read since the last flush
+        self._connection = None
+        self._pid = None
+        self._connect()
+
+    def _connect(self):
+        """Return the connection of this process, opening it on first use."""
+        if self._pid != os.getpid():
+            # A connection inherited from the parent process must not be used
+            self._connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(_SCHEMA)
+            self._pid = os.getpid()
+            self._pending = {}
+            self._touched = set()
+            self._count = 0  # Estimated number of entries, see flush
+            self._flushes = 0
+        return self._connection
+
+    def __len__(self):
+        self.flush()
+        return self._connect().execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def get(self, key):
+        """Return (move, value, searched depth) for a key, or None."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """Look up several keys in as few queries as possible.
+
+        Args:
+            keys (list): (fingerprint, depth, position) tuples
+
+        Returns:
+            dict: (move, value, searched depth) for every key found
+        """
+        connection = self._connect()
+        found = {}
+        missing = []
+        for key in keys:
+            if key in self._pending:
+                found[key] = self._pending[key]
+            else:
+                missing.append(key)
+
+        # Keys of one engine and depth share the first two columns
+        groups = {}
+        for fingerprint, depth, position in missing:
+            groups.setdefault((fingerprint, depth), []).append(position)
+        for (fingerprint, depth), positions in groups.items():
+            for start in range(0, len(positions), _LOOKUP_CHUNK):
+                chunk = positions[start:start + _LOOKUP_CHUNK]
+                rows = connection.execute(
+                    "SELECT position, move, value, searched_depth FROM positions "
+                    f"WHERE fingerprint = ? AND depth = ? AND position IN ({','.join('?' * len(chunk))})",
+                    [fingerprint, depth, *chunk])
+                for position, move, value, searched_depth in rows:
+                    key = (fingerprint, depth, position)
+                    found[key] = (move, value, searched_depth)
+                    self._touched.add(key)
+
+        hits = sum(key in found for key in keys)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return found
+
+    def put(self, key, move, value, searched_depth):
+        """Buffer a search result, writing the buffer once it holds batch_size entries."""
+        self.put_many({key: (move, value, searched_depth)})
+
+    def put_many(self, entries):
+        """Buffer several search results.
+
+        Args:
+            entries (dict): (move, value, searched depth) by (fingerprint, depth, position)
+        """
+        self._connect()
+        self._pending.update(entries)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write buffered results and last-use times in one transaction, then evict."""
+        connection = self._connect()
+        if not self._pending and not self._touched:
+            return
+
+        # Counting scans the whole table, so it runs only now and then, and
+        # outside the write transaction that other processes wait for
+        if self._flushes % _COUNT_INTERVAL == 0:
+            self._count = connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+        self._flushes += 1
+        self._count += len(self._pending)
+
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(*key, move, value, searched_depth, now)
+                 for key, (move, value, searched_depth) in self._pending.items()])
+            connection.executemany(
+                "UPDATE positions SET last_used = ? WHERE fingerprint = ? AND depth = ? AND position = ?",
+                [(now, *key) for key in self._touched - self._pending.keys()])
+            self._evict(connection)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self._pending.clear()
+        self._touched.clear()
+
+    def _evict(self, connection):
+        """Delete the least recently used entries above the size cap.
+
+        Only an estimated size above the cap triggers an exact count. The cache
+        then shrinks to 90% of max_entries, so eviction does not run on every
+        flush once the cache is full.
+        """
+        if self._count <= self.max_entries:
+            return
+        count = connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+        self._count = count
+        if count <= self.max_entries:
+            return
+        excess = count - int(self.max_entries * 0.9)
+        connection.execute(
+            "DELETE FROM positions WHERE (fingerprint, depth, position) IN "
+            "(SELECT fingerprint, depth, position FROM positions ORDER BY last_used LIMIT ?)",
+            (excess,))
+        self._count -= excess
+
+    def clear(self):
+        """Delete every entry."""
+        self._pending.clear()
+        self._touched.clear()
+        self._connect().execute("DELETE FROM positions")
+        self._count = 0
+
+    def close(self):
+        """Flush the buffer and close the connection of this process."""
+        if self._pid == os.getpid():
+            self.flush()
+            self._connection.close()
+        self._connection = None
+        self._pid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getstate__(self):
+        # Worker processes reopen the database from its path
+        state = self.__dict__.copy()
+        state.update(_connection=None, _pid=None, _pending={}, _touched=set(), _count=0, _flushes=0)
+        return state
@@ -0,0 +1,153 @@
+import os
+import signal
+import argparse
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Low-overhead stack sampler driven by the CPU-time interval timer.
+
+    Every interval of CPU time, SIGPROF interrupts the main thread and the
+    handler records the current call stack. Unlike cProfile nothing is added
+    to each function call, so deep recursive searches are measured with little
+    distortion. Only available on platforms with signal.setitimer (not Windows).
+    """
+
+    def __init__(self, interval=0.005):
+        """Initialize the profiler.
+
+        Args:
+            interval (float): Seconds of CPU time between samples
+        """
+        self.interval = interval
+        self.stacks = Counter()
+        self._labels = {}
+        self._previous_handler = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """Start sampling the main thread."""
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        """Stop sampling and restore the previous SIGPROF handler."""
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        if self._previous_handler is not None:
+            signal.signal(signal.SIGPROF, self._previous_handler)
+            self._previous_handler = None
+
+    def _sample(self, signum, frame):
+        """Record the stack of the interrupted frame, outermost call first."""
+        labels = self._labels
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+            stack.append(label)
+            frame = frame.f_back
+        stack.reverse()
+        self.stacks[tuple(stack)] += 1
+
+    def take_stacks(self):
+        """Return the samples collected so far as {collapsed stack: count} and reset them."""
+        stacks = {";".join(stack): count for stack, count in self.stacks.items()}
+        self.stacks.clear()
+        return stacks
+
+    def merge(self, stacks):
+        """Add samples from take_stacks of another profiler, e.g. of a worker process."""
+        for stack, count in stacks.items():
+            self.stacks[tuple(stack.split(";"))] += count
+
+    @property
+    def samples(self):
+        return sum(self.stacks.values())
+
+    def write_collapsed(self, path):
+        """Write the samples in collapsed-stack format, one 'a;b;c count' line per stack.
+
+        The file can be turned into a flame graph by flamegraph.pl or speedscope.
+        """
+        with open(path, "w") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{';'.join(stack)} {count}\n")
+
+    def function_table(self):
+        """Return per-function sample counts.
+
+        Returns:
+            list: (function, self samples, total samples) sorted by self samples;
+                a recursive function counts once per sample in its total
+        """
+        self_counts = Counter()
+        total_counts = Counter()
+        for stack, count in self.stacks.items():
+            self_counts[stack[-1]] += count
+            for label in set(stack):
+                total_counts[label] += count
+
+        return sorted(((label, self_counts[label], total) for label, total in total_counts.items()),
+                      key=lambda row: (row[1], row[2]), reverse=True)
+
+    def report(self, limit=20):
+        """Return the function table as text, with percentages of all samples."""
+        samples = self.samples
+        lines = [f"{samples} samples at {self.interval * 1000:g} ms",
+                 f"{'Self %':>7} {'Total %':>8} {'Samples':>8}  Function"]
+        for label, self_count, total in self.function_table()[:limit]:
+            lines.append(f"{100 * self_count / samples:7.1f} {100 * total / samples:8.1f} "
+                         f"{self_count:>8}  {label}")
+        return "\n".join(lines)
+
+
+def add_profile_arguments(parser):
+    """Add the --profile and --profile-interval options to a command line parser."""
+    parser.add_argument("--profile", default=None, metavar="PATH",
+                        help="Sample the run and write collapsed stacks to PATH")
+    parser.add_argument("--profile-interval", type=float, default=5.0,
+                        help="Milliseconds of CPU time between profile samples")
+
+
+def profiler_from_args(args):
+    """Return a SamplingProfiler for parsed --profile options, or None if profiling is off."""
+    if args.profile is None:
+        return None
+    return SamplingProfiler(args.profile_interval / 1000)
+
+
+def finish_profile(profiler, path, output=None):
+    """Write the collapsed stacks of a finished run and print its function table."""
+    profiler.write_collapsed(path)
+    print(profiler.report(), file=output)
+    print(f"Collapsed stacks written to {path}", file=output)
+
+
+def main():
+    """Profile a fixed-depth search of the start position."""
+    from Game import Game
+    from AI import KalahaAI
+
+    parser = argparse.ArgumentParser(description="Profile a Kalaha engine search")
+    parser.add_argument("--depth", type=int, default=8, help="Search depth")
+    parser.add_argument("--pits", type=int, default=6, help="Pits per player")
+    parser.add_argument("--seeds", type=int, default=4, help="Seeds per pit")
+    parser.add_argument("--output", default="profile.collapsed", help="Collapsed stacks file")
+    parser.add_argument("--interval", type=float, default=1.0, help="Milliseconds of CPU time between samples")
+    args = parser.parse_args()
+
+    with SamplingProfiler(args.interval / 1000) as profiler:
+        KalahaAI(max_depth=args.depth).search(Game(args.pits, args.seeds))
+    finish_profile(profiler, args.output)
+
+
+if __name__ == "__main__":
+    main()
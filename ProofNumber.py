@@ -0,0 +1,272 @@
+import time
+import argparse
+from Game import Game
+
+# Game-theoretic results for the side to move
+WIN = "win"
+DRAW = "draw"
+LOSS = "loss"
+UNKNOWN = "unknown"
+
+INFINITY = float('inf')
+
+
+class ProofCache:
+    """Proven bounds on the final store margin, keyed by canonical position.
+
+    Bounds are relative to the side to move, so a position and its mirror image
+    share one entry. Every proof or disproof tightens the bounds of the
+    positions it settled, and later searches can skip those subtrees.
+    """
+
+    def __init__(self, max_entries=1000000):
+        self.max_entries = max_entries
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Return (lower, upper) bounds on the final margin for the side to move, or None."""
+        return self.entries.get(key)
+
+    def tighten(self, key, lower=-INFINITY, upper=INFINITY):
+        """Combine new bounds with the stored ones."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            lower = max(lower, entry[0])
+            upper = min(upper, entry[1])
+        elif len(self.entries) >= self.max_entries:
+            self.entries.clear()
+        self.entries[key] = (lower, upper)
+
+    def result(self, key):
+        """Return WIN, DRAW or LOSS if the bounds settle the position, else None."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        lower, upper = entry
+        if lower > 0:
+            return WIN
+        if upper < 0:
+            return LOSS
+        if lower == 0 and upper == 0:
+            return DRAW
+        return None
+
+
+class _Node:
+    """Node of the proof-number search tree."""
+
+    __slots__ = ('game', 'key', 'move', 'is_or', 'proof', 'disproof', 'children', 'parent')
+
+    def __init__(self, game, move, is_or, parent):
+        self.game = game
+        self.key = game.get_canonical_key()
+        self.move = move
+        self.is_or = is_or
+        self.proof = 1
+        self.disproof = 1
+        self.children = None
+        self.parent = parent
+
+
+class ProofNumberSearch:
+    """Proof-number search proving wins, draws or losses within a node budget.
+
+    Unlike a fixed-depth alpha-beta search, proof-number search follows the
+    most promising lines to any depth, which finds long forced wins built from
+    chains of free turns.
+    """
+
+    def __init__(self, max_nodes=100000, cache=None):
+        """Initialize the search.
+
+        Args:
+            max_nodes (int): Maximum number of tree nodes per proof, which also bounds memory
+            cache (ProofCache): Cache of proven results, shared between searches
+        """
+        self.max_nodes = max_nodes
+        self.cache = cache if cache is not None else ProofCache()
+        self.nodes = 0
+
+    def solve(self, game):
+        """Find the game-theoretic result of a position for the side to move.
+
+        Returns:
+            dict: 'result' (WIN, DRAW, LOSS or UNKNOWN), 'move' achieving a win
+                or draw (None otherwise) and 'nodes' searched
+        """
+        self.nodes = 0
+        if game.game_over:
+            margin = self._margin(game, game.current_player)
+            result = WIN if margin > 0 else LOSS if margin < 0 else DRAW
+            return {'result': result, 'move': None, 'nodes': 0}
+
+        # First try to prove a win, then at least a draw
+        proven, move = self.prove(game, 0)
+        if proven:
+            return {'result': WIN, 'move': move, 'nodes': self.nodes}
+        if proven is None:
+            return {'result': UNKNOWN, 'move': None, 'nodes': self.nodes}
+
+        proven, move = self.prove(game, -1)
+        if proven:
+            return {'result': DRAW, 'move': move, 'nodes': self.nodes}
+        if proven is None:
+            return {'result': UNKNOWN, 'move': None, 'nodes': self.nodes}
+        return {'result': LOSS, 'move': None, 'nodes': self.nodes}
+
+    def prove(self, game, threshold):
+        """Prove or disprove that the side to move ends with a store margin above threshold.
+
+        Args:
+            game (Game): Root position
+            threshold (int): 0 proves a win, -1 proves at least a draw
+
+        Returns:
+            tuple: (True if proven, False if disproven, None if the node budget
+                ran out; a move that proves it, or None)
+        """
+        player = game.current_player
+        root = _Node(game, None, True, None)
+        self._set_numbers(root, player, threshold)
+        tree_size = 1
+
+        # Always expand the root, so a proof comes with a move even when the
+        # cache already settles the position
+        if not game.game_over:
+            tree_size += self._expand(root, player, threshold)
+            self._update_ancestors(root, player, threshold)
+
+        while root.proof != 0 and root.disproof != 0 and tree_size < self.max_nodes:
+            node = root
+            while node.children is not None:
+                node = self._most_proving_child(node)
+
+            tree_size += self._expand(node, player, threshold)
+            self._update_ancestors(node, player, threshold)
+
+        if root.proof == 0:
+            move = next(child.move for child in root.children if child.proof == 0) if root.children else None
+            return True, move
+        if root.disproof == 0:
+            return False, None
+        return None, None
+
+    @staticmethod
+    def _margin(game, player):
+        """Return the store margin of a player."""
+        board = game.board
+        return board[board.get_player_store(player)] - board[board.get_player_store(1 - player)]
+
+    def _set_numbers(self, node, player, threshold):
+        """Initialize the proof and disproof numbers of a new node."""
+        self.nodes += 1
+        game = node.game
+
+        # Bounds on the final margin from the seeds banked and still in play,
+        # exact once the game is over
+        lower, upper = game.get_margin_bounds(player)
+
+        bounds = self.cache.get(node.key)
+        if bounds is not None and not game.game_over:
+            # Cached bounds are for the side to move at the node
+            if game.current_player == player:
+                lower, upper = max(lower, bounds[0]), min(upper, bounds[1])
+            else:
+                lower, upper = max(lower, -bounds[1]), min(upper, -bounds[0])
+
+        if lower > threshold:
+            node.proof, node.disproof = 0, INFINITY
+        elif upper <= threshold:
+            node.proof, node.disproof = INFINITY, 0
+        elif node.is_or:
+            node.proof, node.disproof = 1, len(game.get_possible_moves())
+        else:
+            node.proof, node.disproof = len(game.get_possible_moves()), 1
+
+    def _expand(self, node, player, threshold):
+        """Create the children of a node.
+
+        Returns:
+            int: Number of nodes added
+        """
+        game = node.game
+        node.children = []
+        for child in game.expand():
+            child_node = _Node(game.get_child(child), child.move, child.current_player == player, node)
+            self._set_numbers(child_node, player, threshold)
+            node.children.append(child_node)
+        return len(node.children)
+
+    @staticmethod
+    def _most_proving_child(node):
+        """Return the child that most cheaply changes the node's numbers."""
+        if node.is_or:
+            return min(node.children, key=lambda child: child.proof)
+        return min(node.children, key=lambda child: child.disproof)
+
+    def _update_ancestors(self, node, player, threshold):
+        """Recompute proof and disproof numbers from a node up to the root."""
+        expanded = True
+        while node is not None:
+            if node.is_or:
+                proof = min(child.proof for child in node.children)
+                disproof = sum(child.disproof for child in node.children)
+            else:
+                proof = sum(child.proof for child in node.children)
+                disproof = min(child.disproof for child in node.children)
+
+            # Ancestors of an unchanged node cannot change either
+            if not expanded and proof == node.proof and disproof == node.disproof:
+                break
+            expanded = False
+            node.proof, node.disproof = proof, disproof
+
+            if proof == 0 or disproof == 0:
+                self._record(node, player, threshold)
+
+            node = node.parent
+
+    def _record(self, node, player, threshold):
+        """Store the result of a settled node in the cache, relative to its side to move."""
+        own_side = node.game.current_player == player
+        if node.proof == 0:
+            # The searching player's margin is above threshold
+            if own_side:
+                self.cache.tighten(node.key, lower=threshold + 1)
+            else:
+                self.cache.tighten(node.key, upper=-threshold - 1)
+        else:
+            # The searching player's margin is at most threshold
+            if own_side:
+                self.cache.tighten(node.key, upper=threshold)
+            else:
+                self.cache.tighten(node.key, lower=-threshold)
+
+
+def main():
+    """Analyze a position with proof-number search."""
+    parser = argparse.ArgumentParser(description="Prove Kalaha positions with proof-number search")
+    parser.add_argument("--pits", type=int, default=6, help="Pits per player")
+    parser.add_argument("--seeds", type=int, default=4, help="Seeds per pit")
+    parser.add_argument("--moves", default="", help="Comma-separated moves leading to the position")
+    parser.add_argument("--nodes", type=int, default=1000000, help="Node budget")
+    args = parser.parse_args()
+
+    game = Game(pits=args.pits, seeds=args.seeds)
+    for move in filter(None, args.moves.split(",")):
+        game.make_move(int(move))
+    game.print_board()
+
+    start_time = time.time()
+    result = ProofNumberSearch(max_nodes=args.nodes).solve(game)
+    print(f"Result for Player {game.current_player + 1}: {result['result']}")
+    if result['move'] is not None:
+        print(f"Move: {result['move']}")
+    print(f"Nodes: {result['nodes']} in {time.time() - start_time:.2f} sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+class Rules:
+    """Rule variant of a Kalaha game.
+
+    The default rules capture only when the opposite pit holds seeds, allow
+    captures on any sowing and sweep the remaining seeds to their owners when
+    a side runs empty. Game uses its own move code for the default rules and a
+    move function built for the variant otherwise, see get_move_function.
+    """
+
+    def __init__(self, capture_empty=False, sweep_to_emptier=False, first_lap_capture=True):
+        """Initialize the rules.
+
+        Args:
+            capture_empty (bool): A last seed landing in an own empty pit is
+                captured even if the opposite pit is empty
+            sweep_to_emptier (bool): At the end all remaining seeds go to the
+                player whose side ran empty instead of to their owners
+            first_lap_capture (bool): Captures are allowed on sowings that do
+                not go around the board; False allows them only after a full lap
+        """
+        self.capture_empty = capture_empty
+        self.sweep_to_emptier = sweep_to_emptier
+        self.first_lap_capture = first_lap_capture
+
+    @property
+    def key(self):
+        return (self.capture_empty, self.sweep_to_emptier, self.first_lap_capture)
+
+    def __eq__(self, other):
+        return isinstance(other, Rules) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return (f"Rules(capture_empty={self.capture_empty}, sweep_to_emptier={self.sweep_to_emptier}, "
+                f"first_lap_capture={self.first_lap_capture})")
+
+    def is_default(self):
+        return self == DEFAULT_RULES
+
+    def to_dict(self):
+        """Return the rules as a serializable dict."""
+        return {
+            'capture_empty': self.capture_empty,
+            'sweep_to_emptier': self.sweep_to_emptier,
+            'first_lap_capture': self.first_lap_capture
+        }
+
+    @classmethod
+    def parse(cls, text):
+        """Create rules from a comma-separated list of variant names.
+
+        Names are capture_empty, sweep_to_emptier and no_first_lap_capture;
+        an empty string or 'default' gives the default rules.
+        """
+        names = {name.strip() for name in text.split(",")} - {"", "default"}
+        unknown = names - {"capture_empty", "sweep_to_emptier", "no_first_lap_capture"}
+        if unknown:
+            raise ValueError(f"Unknown rule variants: {', '.join(sorted(unknown))}")
+        return cls(capture_empty="capture_empty" in names,
+                   sweep_to_emptier="sweep_to_emptier" in names,
+                   first_lap_capture="no_first_lap_capture" not in names)
+
+    def get_move_function(self, pits):
+        """Return the move function of these rules for a board size.
+
+        The function is assembled once from the capture and sweep steps of the
+        variant, so the sowing loop itself never checks a rule flag.
+
+        Returns:
+            callable: move(state, player, pit) playing a legal move on a board
+                state list in place and returning (free turn, seeds captured, game over)
+        """
+        key = (self.key, pits)
+        if key not in _MOVE_FUNCTIONS:
+            _MOVE_FUNCTIONS[key] = _build_move_function(self, pits)
+        return _MOVE_FUNCTIONS[key]
+
+
+DEFAULT_RULES = Rules()
+
+# Move functions by (rules key, pits)
+_MOVE_FUNCTIONS = {}
+
+
+def _build_move_function(rules, pits):
+    """Assemble the move function of a rule variant, see Rules.get_move_function."""
+    size = 2 * pits + 2
+    lap = size - 1  # Seeds sown in one trip around the board
+    stores = (pits, 2 * pits + 1)
+    sides = (range(pits), range(pits + 1, 2 * pits + 1))
+
+    if rules.capture_empty:
+        def capture(state, player, last):
+            opposite = 2 * pits - last
+            captured = state[opposite] + 1
+            state[stores[player]] += captured
+            state[opposite] = 0
+            state[last] = 0
+            return captured
+    else:
+        def capture(state, player, last):
+            opposite = 2 * pits - last
+            if state[opposite] == 0:
+                return 0
+            captured = state[opposite] + 1
+            state[stores[player]] += captured
+            state[opposite] = 0
+            state[last] = 0
+            return captured
+
+    if rules.sweep_to_emptier:
+        def sweep(state, empty_side):
+            # Both sides are empty only when no seeds are left to sweep
+            store = stores[empty_side]
+            for side in sides:
+                for i in side:
+                    state[store] += state[i]
+                    state[i] = 0
+    else:
+        def sweep(state, empty_side):
+            for player, side in enumerate(sides):
+                for i in side:
+                    state[stores[player]] += state[i]
+                    state[i] = 0
+
+    first_lap_capture = rules.first_lap_capture
+
+    def move(state, player, pit):
+        index = pit if player == 0 else pit + pits + 1
+        seeds = state[index]
+        state[index] = 0
+        skipped = stores[1 - player]
+
+        last = index
+        remaining = seeds
+        while remaining > 0:
+            last = (last + 1) % size
+            if last != skipped:
+                state[last] += 1
+                remaining -= 1
+
+        captured = 0
+        if state[last] == 1 and last in sides[player] and (first_lap_capture or seeds >= lap):
+            captured = capture(state, player, last)
+
+        for empty_side, side in enumerate(sides):
+            if not any(state[i] for i in side):
+                sweep(state, empty_side)
+                return False, captured, True
+        return last == stores[player], captured, False
+
+    return move
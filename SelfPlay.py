@@ -0,0 +1,250 @@
+import os
+import json
+import random
+import argparse
+import multiprocessing
+import numpy as np
+from Game import Game
+from AI import KalahaAI, make_engine
+
+# Engine and settings of the current worker process, set up by _init_worker
+_worker = {}
+
+
+def record_dtype(pits):
+    """Return the numpy dtype of one recorded position for a board size.
+
+    Fields:
+        board: Full board state, in Board.state layout
+        player: Side to move (0 or 1)
+        score: Search score for the side to move (NaN if the engine gave none)
+        best_move: Move chosen by the search
+        outcome: Final result for the side to move (1 win, 0 draw, -1 loss)
+        margin: Final store margin for the side to move
+        game: Index of the game the position comes from
+        ply: Number of moves played before the position
+    """
+    return np.dtype([
+        ('board', '<i2', (2 * pits + 2,)),
+        ('player', 'i1'),
+        ('score', '<f4'),
+        ('best_move', 'i1'),
+        ('outcome', 'i1'),
+        ('margin', '<i2'),
+        ('game', '<i8'),
+        ('ply', '<i2')
+    ])
+
+
+def _init_worker(spec, pits, seeds, opening_plies, rng_seed):
+    """Create the self-play engine of a worker process."""
+    _worker['engine'] = make_engine(spec)
+    _worker['settings'] = (pits, seeds, opening_plies, rng_seed)
+
+
+def _play_selfplay_game(game_index):
+    """Play one self-play game and return its searched positions.
+
+    The game starts with a few random moves, seeded by the game index, so
+    deterministic engines do not replay the same game over and over.
+
+    Returns:
+        numpy.ndarray: One record per position searched by the engine
+    """
+    engine = _worker['engine']
+    pits, seeds, opening_plies, rng_seed = _worker['settings']
+    rng = random.Random(f"{rng_seed}-{game_index}")
+
+    game = Game(pits, seeds)
+    for _ in range(opening_plies):
+        if game.game_over:
+            break
+        game.make_move(rng.choice(game.get_possible_moves()))
+
+    positions = []
+    ply = opening_plies
+    while not game.game_over:
+        move, value, _ = engine.search(game)
+        positions.append((game.board.get_state(), game.current_player, value, move, ply))
+        game.make_move(move)
+        ply += 1
+
+    final_margin = game.board[game.board.pits] - game.board[2 * game.board.pits + 1]
+
+    records = np.zeros(len(positions), dtype=record_dtype(pits))
+    for i, (state, player, value, move, position_ply) in enumerate(positions):
+        margin = final_margin if player == 0 else -final_margin
+        records[i] = (state, player, np.nan if value is None else value, move,
+                      np.sign(margin), margin, game_index, position_ply)
+    return records
+
+
+class ShardWriter:
+    """Writes records into fixed-size .npy shards opened as memory maps.
+
+    Only the current shard is mapped, so memory use stays bounded no matter
+    how many positions are written. index.json lists every finished shard
+    with its number of valid rows.
+    """
+
+    def __init__(self, directory, dtype, shard_size, metadata=None):
+        """Initialize the writer.
+
+        Args:
+            directory (str): Output directory
+            dtype (numpy.dtype): Record dtype
+            shard_size (int): Rows per shard
+            metadata (dict): Extra information stored in the index
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.dtype = dtype
+        self.shard_size = shard_size
+        self.shards = []
+        self.positions = 0
+        self.metadata = metadata or {}
+        self._shard = None
+        self._file_name = None
+        self._rows = 0
+
+    def write(self, records):
+        """Append records, opening new shards as needed."""
+        start = 0
+        while start < len(records):
+            if self._shard is None:
+                self._open_shard()
+
+            count = min(len(records) - start, self.shard_size - self._rows)
+            self._shard[self._rows:self._rows + count] = records[start:start + count]
+            self._rows += count
+            self.positions += count
+            start += count
+
+            if self._rows == self.shard_size:
+                self._close_shard()
+
+    def _open_shard(self):
+        file_name = f"shard_{len(self.shards):06d}.npy"
+        self._file_name = file_name
+        self._shard = np.lib.format.open_memmap(
+            os.path.join(self.directory, file_name), mode='w+', dtype=self.dtype, shape=(self.shard_size,)
+        )
+        self._rows = 0
+
+    def _close_shard(self):
+        self._shard.flush()
+        self._shard = None
+        self.shards.append({'file': self._file_name, 'rows': self._rows})
+        self._write_index()
+
+    def _write_index(self):
+        """Write the index file atomically."""
+        index = dict(self.metadata)
+        index['dtype'] = np.lib.format.dtype_to_descr(self.dtype)
+        index['shard_size'] = self.shard_size
+        index['positions'] = sum(shard['rows'] for shard in self.shards)
+        index['shards'] = self.shards
+
+        path = os.path.join(self.directory, "index.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def close(self):
+        """Finish the last partial shard and write the final index."""
+        if self._shard is not None:
+            self._close_shard()
+        else:
+            self._write_index()
+
+
+def generate_selfplay(directory, num_games, spec=None, workers=None, pits=6, seeds=4,
+                      opening_plies=4, shard_size=1000000, rng_seed=0):
+    """Run engine self-play in a process pool and stream positions to shards.
+
+    Args:
+        directory (str): Output directory for shards and index.json
+        num_games (int): Number of games to play
+        spec (dict): Engine spec (see KalahaAI.get_spec), a depth 5 KalahaAI by default
+        workers (int): Number of worker processes (CPU count by default)
+        pits (int): Number of pits per player
+        seeds (int): Initial number of seeds per pit
+        opening_plies (int): Random moves played at the start of each game
+        shard_size (int): Positions per shard
+        rng_seed (int): Seed for the random openings
+
+    Returns:
+        dict: The index of the written data set
+    """
+    if spec is None:
+        spec = KalahaAI(max_depth=5).get_spec()
+    workers = workers or os.cpu_count()
+
+    writer = ShardWriter(directory, record_dtype(pits), shard_size, metadata={
+        'engine': spec,
+        'pits': pits,
+        'seeds': seeds,
+        'opening_plies': opening_plies,
+        'rng_seed': rng_seed
+    })
+
+    # Games are submitted in bounded batches so finished games never pile up
+    # in memory while the writer catches up
+    batch_size = workers * 16
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(spec, pits, seeds, opening_plies, rng_seed)) as pool:
+        for batch_start in range(0, num_games, batch_size):
+            batch = range(batch_start, min(batch_start + batch_size, num_games))
+            for records in pool.imap_unordered(_play_selfplay_game, batch):
+                writer.write(records)
+
+    writer.close()
+    return read_index(directory)
+
+
+def read_index(directory):
+    """Load the index of a self-play data set."""
+    with open(os.path.join(directory, "index.json")) as f:
+        return json.load(f)
+
+
+def iter_selfplay(directory, batch_size=65536):
+    """Stream the positions of a self-play data set in batches.
+
+    Shards are opened as read-only memory maps, so only the rows being used
+    are read from disk.
+
+    Yields:
+        numpy.ndarray: Up to batch_size records at a time
+    """
+    index = read_index(directory)
+    for shard in index['shards']:
+        data = np.load(os.path.join(directory, shard['file']), mmap_mode='r')
+        for start in range(0, shard['rows'], batch_size):
+            yield data[start:min(start + batch_size, shard['rows'])]
+
+
+def main():
+    """Generate self-play training data from the command line."""
+    parser = argparse.ArgumentParser(description="Kalaha self-play training data generator")
+    parser.add_argument("directory", help="Output directory")
+    parser.add_argument("--games", type=int, default=100, help="Number of games")
+    parser.add_argument("--depth", type=int, default=5, help="Maximum search depth")
+    parser.add_argument("--budget", type=float, default=None, help="Time budget per move in seconds")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument("--pits", type=int, default=6, help="Pits per player")
+    parser.add_argument("--seeds", type=int, default=4, help="Seeds per pit")
+    parser.add_argument("--opening-plies", type=int, default=4, help="Random moves at the start of each game")
+    parser.add_argument("--shard-size", type=int, default=1000000, help="Positions per shard")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the openings")
+    args = parser.parse_args()
+
+    spec = KalahaAI(max_depth=args.depth, time_budget=args.budget).get_spec()
+    index = generate_selfplay(args.directory, args.games, spec=spec, workers=args.workers,
+                              pits=args.pits, seeds=args.seeds, opening_plies=args.opening_plies,
+                              shard_size=args.shard_size, rng_seed=args.seed)
+    print(f"Wrote {index['positions']} positions in {len(index['shards'])} shards to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+import os
+import pickle
+import sqlite3
+import time
+import argparse
+from Game import Game
+
+
+class SolverTable:
+    """Transposition table holding (lower, upper) bounds on exact position values.
+
+    Entries live in memory until the table reaches its capacity. The oldest
+    half is then written to an SQLite file (if a spill path is given) or dropped.
+    Dropping entries only costs search time, never correctness.
+    """
+
+    def __init__(self, capacity=2000000, spill_path=None):
+        """Initialize the table.
+
+        Args:
+            capacity (int): Maximum number of entries kept in memory
+            spill_path (str): Optional SQLite file receiving entries evicted from memory
+        """
+        self.capacity = capacity
+        self.entries = {}
+        self.spill_path = spill_path
+        self._db = None
+
+        if spill_path is not None:
+            self._db = sqlite3.connect(spill_path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS bounds (key BLOB PRIMARY KEY, lower INTEGER, upper INTEGER)"
+            )
+
+    def __len__(self):
+        spilled = 0
+        if self._db is not None:
+            spilled = self._db.execute("SELECT COUNT(*) FROM bounds").fetchone()[0]
+        return len(self.entries) + spilled
+
+    def get(self, key):
+        """Return the (lower, upper) bounds stored for a key, or None."""
+        entry = self.entries.get(key)
+        if entry is None and self._db is not None:
+            row = self._db.execute("SELECT lower, upper FROM bounds WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                entry = (row[0], row[1])
+                self.put(key, entry[0], entry[1])
+        return entry
+
+    def put(self, key, lower, upper):
+        """Store bounds for a key, spilling old entries if memory is full."""
+        self.entries[key] = (lower, upper)
+        if len(self.entries) > self.capacity:
+            self._spill()
+
+    def _spill(self):
+        """Move the oldest half of the in-memory entries to disk (or drop them)."""
+        count = len(self.entries) // 2
+        oldest = []
+        for key in self.entries:
+            if len(oldest) >= count:
+                break
+            oldest.append(key)
+
+        if self._db is not None:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO bounds (key, lower, upper) VALUES (?, ?, ?)",
+                ((key, *self.entries[key]) for key in oldest)
+            )
+            self._db.commit()
+
+        for key in oldest:
+            del self.entries[key]
+
+    def items(self):
+        """Iterate over all (key, (lower, upper)) pairs, in memory and on disk."""
+        yield from self.entries.items()
+        if self._db is not None:
+            for key, lower, upper in self._db.execute("SELECT key, lower, upper FROM bounds"):
+                if key not in self.entries:
+                    yield key, (lower, upper)
+
+    def close(self):
+        """Close the spill file."""
+        if self._db is not None:
+            self._db.commit()
+            self._db.close()
+            self._db = None
+
+
+class Tablebase:
+    """Database of exact position values for perfect play.
+
+    Values are the net number of seeds the side to move will still gain over
+    the opponent with perfect play, which only depends on the pits and not on
+    the seeds already in the stores.
+    """
+
+    def __init__(self, values=None, path=None):
+        self.values = values if values is not None else {}
+        self.path = path
+
+    def __len__(self):
+        return len(self.values)
+
+    @staticmethod
+    def position_key(game):
+        """Return the key of a position: its canonical pits without the stores.
+
+        Values are relative to the side to move, so mirrored positions share
+        their entry without any sign change.
+        """
+        key = game.get_canonical_key()
+        pits = game.board.pits
+        return bytes(key[:pits] + key[pits + 1:2 * pits + 1])
+
+    def lookup(self, game):
+        """Return the exact remaining margin for the side to move, or None if unknown."""
+        if game.game_over:
+            return 0
+        return self.values.get(self.position_key(game))
+
+    def solve(self, game):
+        """Solve a position from the values of its children.
+
+        Returns:
+            dict: Final store margin for the side to move ('value'), the remaining
+                margin still to be won ('remaining_value') and a perfect move, as
+                KalahaSolver.solve returns them, or None if any child position is
+                missing
+        """
+        best_move = None
+        best_value = None
+
+        for child in game.expand():
+            child_value = self.lookup(game.get_child(child))
+            if child_value is None:
+                return None
+
+            gain = _child_gain(game, child)
+            value = gain + child_value if child.current_player == game.current_player else gain - child_value
+            if best_value is None or value > best_value:
+                best_value = value
+                best_move = child.move
+
+        if best_move is None:
+            return None
+        return {
+            'value': _store_margin(game, game.current_player) + best_value,
+            'remaining_value': best_value,
+            'best_move': best_move
+        }
+
+    def best_move(self, game):
+        """Return a perfect move, or None if any child position is missing."""
+        solution = self.solve(game)
+        return solution['best_move'] if solution is not None else None
+
+    def save(self, path):
+        """Save the tablebase to a file."""
+        with open(path, "wb") as f:
+            pickle.dump(self.values, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.path = path
+
+    @classmethod
+    def load(cls, path):
+        """Load a tablebase saved with save."""
+        with open(path, "rb") as f:
+            return cls(pickle.load(f), path=path)
+
+
+def _store_margin(game, player):
+    """Return the store difference from a player's point of view."""
+    board = game.board
+    return board[board.get_player_store(player)] - board[board.get_player_store(1 - player)]
+
+
+def _child_gain(game, child):
+    """Return the store margin gained by the side to move when playing an expand() child."""
+    board = game.board
+    own_store = board.get_player_store(game.current_player)
+    other_store = board.get_player_store(1 - game.current_player)
+    return (child.state[own_store] - board[own_store]) - (child.state[other_store] - board[other_store])
+
+
+class KalahaSolver:
+    """Exact solver for small Kalaha configurations based on MTD(f).
+
+    MTD(f) finds the exact value with a series of null-window alpha-beta
+    searches that share one transposition table of bounds.
+    """
+
+    def __init__(self, table=None, checkpoint_path=None, checkpoint_interval=600):
+        """Initialize the solver.
+
+        Args:
+            table (SolverTable): Transposition table (a new in-memory one by default)
+            checkpoint_path (str): Optional file used to save and resume progress
+            checkpoint_interval (float): Seconds between checkpoints
+        """
+        self.table = table if table is not None else SolverTable()
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.nodes = 0
+        self._last_checkpoint = time.time()
+        self._progress = None
+        self._resume_progress = self._load_checkpoint()
+
+    def solve(self, game):
+        """Solve a position exactly.
+
+        Args:
+            game (Game): The position to solve
+
+        Returns:
+            dict: Final store margin for the side to move ('value'), the remaining
+                margin still to be won ('remaining_value'), a perfect move and the
+                number of searched nodes
+        """
+        remaining_value = self.mtdf(game)
+        return {
+            'value': _store_margin(game, game.current_player) + remaining_value,
+            'remaining_value': remaining_value,
+            'best_move': self.best_move(game, remaining_value),
+            'nodes': self.nodes
+        }
+
+    def mtdf(self, game, guess=0):
+        """Return the exact remaining margin for the side to move using MTD(f)."""
+        if game.game_over:
+            return 0
+
+        key = Tablebase.position_key(game)
+        in_play = game.board.get_seeds_in_play()
+        lower, upper = -in_play, in_play
+
+        # Continue from the bounds of an interrupted run on the same root
+        if self._resume_progress is not None and self._resume_progress[0] == key:
+            lower, upper, guess = self._resume_progress[1:]
+            self._resume_progress = None
+
+        value = guess
+        while lower < upper:
+            beta = value + 1 if value == lower else value
+            self._progress = (key, lower, upper, value)
+            value = self._search(game, beta - 1, beta)
+
+            if value < beta:
+                upper = value
+            else:
+                lower = value
+
+            self._progress = (key, lower, upper, value)
+            self._maybe_checkpoint()
+
+        self._progress = None
+        return value
+
+    def best_move(self, game, remaining_value=None):
+        """Return a move that achieves the exact value of the position."""
+        children = game.expand()
+        if not children:
+            return None
+        if remaining_value is None:
+            remaining_value = self.mtdf(game)
+
+        # A null-window test per move is enough to find one reaching the value
+        for child in children:
+            if self._child_value(game, child, remaining_value - 1, remaining_value) >= remaining_value:
+                return child.move
+        return children[0].move
+
+    def _child_value(self, game, child, alpha, beta):
+        """Return the fail-soft value of an expand() child for the side to move."""
+        gain = _child_gain(game, child)
+        child_game = game.get_child(child)
+        if child.current_player == game.current_player:
+            return gain + self._search(child_game, alpha - gain, beta - gain)
+        return gain - self._search(child_game, gain - beta, gain - alpha)
+
+    def _search(self, game, alpha, beta):
+        """Fail-soft negamax alpha-beta on the remaining store margin.
+
+        Args:
+            game (Game): The current game state
+            alpha (int): Lower bound of the search window
+            beta (int): Upper bound of the search window
+
+        Returns:
+            int: The value of the position, or a bound on it outside the window
+        """
+        self.nodes += 1
+        if self.nodes % 10000 == 0:
+            self._maybe_checkpoint()
+
+        if game.game_over:
+            return 0
+
+        key = Tablebase.position_key(game)
+        in_play = game.board.get_seeds_in_play()
+        entry = self.table.get(key)
+        lower, upper = entry if entry is not None else (-in_play, in_play)
+
+        if lower >= beta:
+            return lower
+        if upper <= alpha:
+            return upper
+        if lower == upper:
+            return lower
+
+        original_alpha, original_beta = alpha, beta
+        alpha = max(alpha, lower)
+        beta = min(beta, upper)
+
+        # Free turns and big store gains first, so cutoffs come early
+        children = sorted(game.expand(), key=lambda child: (child.free_turn, _child_gain(game, child)), reverse=True)
+
+        best_value = -in_play - 1
+        for child in children:
+            value = self._child_value(game, child, alpha, beta)
+
+            if value > best_value:
+                best_value = value
+            if best_value > alpha:
+                alpha = best_value
+            if alpha >= beta:
+                break
+
+        # Tighten the stored bounds with the result of this search
+        if best_value <= max(original_alpha, lower):
+            upper = min(upper, best_value)
+        elif best_value >= min(original_beta, upper):
+            lower = max(lower, best_value)
+        else:
+            lower = upper = best_value
+        self.table.put(key, lower, upper)
+
+        return best_value
+
+    def build_tablebase(self, game, max_positions=None):
+        """Solve every position reachable from a game and collect exact values.
+
+        Args:
+            game (Game): Root position
+            max_positions (int): Optional limit on the number of positions
+
+        Returns:
+            Tablebase: Exact values for all solved positions
+        """
+        tablebase = Tablebase()
+        stack = [game]
+
+        while stack:
+            if max_positions is not None and len(tablebase) >= max_positions:
+                break
+
+            position = stack.pop()
+            if position.game_over:
+                continue
+
+            key = Tablebase.position_key(position)
+            if key in tablebase.values:
+                continue
+
+            entry = self.table.get(key)
+            if entry is not None and entry[0] == entry[1]:
+                tablebase.values[key] = entry[0]
+            else:
+                tablebase.values[key] = self.mtdf(position)
+
+            for child in position.expand():
+                stack.append(position.get_child(child))
+
+        return tablebase
+
+    def _maybe_checkpoint(self, force=False):
+        """Save the table and MTD(f) progress if the checkpoint interval has passed."""
+        if self.checkpoint_path is None:
+            return
+        if not force and time.time() - self._last_checkpoint < self.checkpoint_interval:
+            return
+
+        checkpoint = {
+            'progress': self._progress,
+            'entries': self.table.entries
+        }
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.checkpoint_path)
+        self._last_checkpoint = time.time()
+
+    def _load_checkpoint(self):
+        """Restore table entries saved by an interrupted run.
+
+        Returns:
+            tuple: (root key, lower, upper, guess) of the interrupted MTD(f) run, or None
+        """
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return None
+
+        with open(self.checkpoint_path, "rb") as f:
+            checkpoint = pickle.load(f)
+
+        for entry_key, (lower, upper) in checkpoint['entries'].items():
+            if entry_key not in self.table.entries:
+                self.table.put(entry_key, lower, upper)
+
+        return checkpoint['progress']
+
+
+def main():
+    """Solve a small Kalaha configuration and write its tablebase."""
+    parser = argparse.ArgumentParser(description="Exact Kalaha solver")
+    parser.add_argument("--pits", type=int, default=4, help="Pits per player")
+    parser.add_argument("--seeds", type=int, default=3, help="Seeds per pit")
+    parser.add_argument("--output", default=None, help="Write a tablebase of all reachable positions to this file")
+    parser.add_argument("--max-positions", type=int, default=None, help="Limit the tablebase size")
+    parser.add_argument("--capacity", type=int, default=2000000, help="In-memory transposition table entries")
+    parser.add_argument("--spill", default=None, help="SQLite file for entries that do not fit in memory")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file to save and resume progress")
+    parser.add_argument("--checkpoint-interval", type=float, default=600, help="Seconds between checkpoints")
+    args = parser.parse_args()
+
+    game = Game(pits=args.pits, seeds=args.seeds)
+    solver = KalahaSolver(
+        table=SolverTable(capacity=args.capacity, spill_path=args.spill),
+        checkpoint_path=args.checkpoint,
+        checkpoint_interval=args.checkpoint_interval
+    )
+
+    start_time = time.time()
+    result = solver.solve(game)
+    print(f"Board: {args.pits} pits x {args.seeds} seeds")
+    print(f"Game value (Player 1 margin): {result['value']}")
+    print(f"Perfect first move: {result['best_move']}")
+    print(f"Nodes: {result['nodes']} in {time.time() - start_time:.1f} sec")
+
+    if args.output is not None:
+        tablebase = solver.build_tablebase(game, max_positions=args.max_positions)
+        tablebase.save(args.output)
+        print(f"Tablebase with {len(tablebase)} positions written to {args.output}")
+
+    solver.table.close()
+
+
+if __name__ == "__main__":
+    main()
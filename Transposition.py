@@ -0,0 +1,121 @@
+import struct
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+# Bound types of stored search values
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+NO_MOVE = -1
+
+
+class TranspositionTable:
+    """In-process transposition table for KalahaAI.
+
+    Entries are keyed by canonical position and hold (depth, flag, value, move),
+    with values relative to the side to move.
+    """
+
+    def __init__(self, max_entries=1000000):
+        self.max_entries = max_entries
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def probe(self, key):
+        """Return (depth, flag, value, move) for a key, or None."""
+        return self.entries.get(key)
+
+    def store(self, key, depth, flag, value, move):
+        """Store a search result, keeping the deeper of two results for a key."""
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > depth:
+            return
+        if entry is None and len(self.entries) >= self.max_entries:
+            self.entries.clear()
+        self.entries[key] = (depth, flag, value, move)
+
+    def clear(self):
+        self.entries.clear()
+
+
+# One slot of the shared table. 'check' is the key hash XOR-ed with the other
+# two words, so an entry torn by a concurrent write fails validation and is
+# treated as a miss instead of needing a lock.
+ENTRY_DTYPE = np.dtype([('check', '<u8'), ('value', '<f8'), ('meta', '<u8')])
+
+_HASH_MASK = 0xFFFFFFFFFFFFFFFF
+
+
+def _double_bits(value):
+    """Return the IEEE 754 bit pattern of a float as an unsigned integer."""
+    return struct.unpack('<Q', struct.pack('<d', value))[0]
+
+
+class SharedTranspositionTable:
+    """Lock-free transposition table in shared memory for several search processes.
+
+    The table is a fixed-size numpy struct array placed in a
+    multiprocessing.shared_memory block. Processes attach to it by name.
+    """
+
+    def __init__(self, size=1 << 20, name=None):
+        """Create a new table, or attach to an existing one.
+
+        Args:
+            size (int): Number of slots
+            name (str): Name of an existing shared memory block to attach to
+        """
+        self.size = size
+        self._owner = name is None
+
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=size * ENTRY_DTYPE.itemsize)
+        else:
+            # Only the creating process may unlink the block, so attaching must
+            # not register it with the resource tracker, which would remove it
+            # when the attaching process exits (Python 3.13 adds track=False)
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None
+            try:
+                self._shm = shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+
+        self.name = self._shm.name
+        self.entries = np.ndarray((size,), dtype=ENTRY_DTYPE, buffer=self._shm.buf)
+        if self._owner:
+            self.entries[:] = 0
+
+    def __len__(self):
+        return int(np.count_nonzero(self.entries['check']))
+
+    def probe(self, key):
+        """Return (depth, flag, value, move) for a key, or None if absent or torn."""
+        key_hash = hash(key) & _HASH_MASK
+        check, value, meta = self.entries[key_hash % self.size].item()
+
+        if check ^ meta ^ _double_bits(value) != key_hash:
+            return None
+
+        return meta & 0xFF, (meta >> 8) & 0x3, value, (meta >> 10) - 1
+
+    def store(self, key, depth, flag, value, move):
+        """Store a search result, always replacing the slot."""
+        key_hash = hash(key) & _HASH_MASK
+        value = float(value)
+        meta = depth | (flag << 8) | ((move + 1) << 10)
+        self.entries[key_hash % self.size] = (key_hash ^ meta ^ _double_bits(value), value, meta)
+
+    def clear(self):
+        self.entries[:] = 0
+
+    def close(self):
+        """Detach from the table, and free it if this process created it."""
+        # The numpy view must go before the shared memory buffer can be released
+        self.entries = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()